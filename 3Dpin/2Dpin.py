@@ -1,100 +1,162 @@
-import cv2
-import mediapipe as mp
+import argparse
+import os
+import sys
+
 import numpy as np
 import pygame
 
-# Initialize Mediapipe and Pygame
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(min_detection_confidence=0.7, min_tracking_confidence=0.7)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import landmark_log
+from common.landmark_filter import PREDICTION, make_landmark_filter
+from common.overlay import Compositor
+from common.roi_inference import make_hand_tracker
+
+# Initialize Pygame
 pygame.init()
 
 # Screen dimensions and dot grid
 WIDTH, HEIGHT = 800, 600
 DOT_SPACING = 20  # Original spacing
 DOT_DEPTH_RANGE = 5  # Reduced range for less glow
+DOT_BASE_SIZE = 3
+FPS = 60  # Render cap; leaves the GIL free for the capture/inference threads
+FILTER_SETTINGS = dict(prediction=PREDICTION)
+RASTER_RENDER = True  # Stamp prebuilt dot sprites in one blits() call; press 'r' to toggle
+
+def make_grid(spacing):
+    """Create a grid of dots, stored as X/Y/Z arrays indexed [column, row]."""
+    grid_x, grid_y = np.meshgrid(
+        np.arange(0, WIDTH, spacing), np.arange(0, HEIGHT, spacing), indexing="ij"
+    )
+    return grid_x, grid_y, np.zeros(grid_x.shape)
 
-# Create a grid of dots
-dots = [[(x, y, 0) for y in range(0, HEIGHT, DOT_SPACING)] for x in range(0, WIDTH, DOT_SPACING)]
+dot_x, dot_y, dot_z = make_grid(DOT_SPACING)
 
 # Initialize Pygame screen
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("2.5D Pin Toy")
+compositor = Compositor((WIDTH, HEIGHT))  # Overlay layers drawn on top of the dots
+
+INFERENCE_SETTINGS = None  # Full frame; RoiHandTracker settings such as dict(scale=0.5) once measured
+
+def make_dot_sprites():
+    """Prebuild one white dot sprite per possible dot size, keyed on a black background."""
+    sprites = {}
+    for size in range(DOT_BASE_SIZE, DOT_BASE_SIZE + DOT_DEPTH_RANGE + 1):
+        sprite = pygame.Surface((2 * size + 1, 2 * size + 1))
+        sprite.set_colorkey((0, 0, 0))
+        pygame.draw.circle(sprite, (255, 255, 255), (size, size), size)
+        sprites[size] = sprite
+    return sprites
 
-# Webcam setup
-cap = cv2.VideoCapture(0)
+dot_sprites = make_dot_sprites()
 
 def update_dots(hand_landmarks_list):
-    for i, column in enumerate(dots):
-        for j, dot in enumerate(column):
-            x, y, z = dot
+    hand_points = np.array([
+        (int(landmark.x * WIDTH), int(landmark.y * HEIGHT))
+        for hand_landmarks in hand_landmarks_list
+        for landmark in hand_landmarks.landmark
+    ], dtype=np.float64).reshape(-1, 2)
 
-            # Find the minimum distance to any hand landmark
-            min_distance = float('inf')
-            for hand_landmarks in hand_landmarks_list:
-                for landmark in hand_landmarks.landmark:
-                    hand_x, hand_y = int(landmark.x * WIDTH), int(landmark.y * HEIGHT)
-                    distance = np.sqrt((x - hand_x)**2 + (y - hand_y)**2)
-                    min_distance = min(min_distance, distance)
+    # Distance from every dot to its nearest hand landmark, for the whole grid at once
+    dx = dot_x[:, :, np.newaxis] - hand_points[:, 0]
+    dy = dot_y[:, :, np.newaxis] - hand_points[:, 1]
+    min_distance = np.sqrt(dx**2 + dy**2).min(axis=2, initial=np.inf)
 
-            # Adjust z based on distance (closer = higher depth, subtler glow)
-            dots[i][j] = (x, y, max(0, DOT_DEPTH_RANGE - min_distance / 10))  # Increased divisor
+    # Adjust z based on distance (closer = higher depth, subtler glow)
+    np.maximum(0, DOT_DEPTH_RANGE - min_distance / 10, out=dot_z)  # Increased divisor
 
 def draw_dots():
     screen.fill((0, 0, 0))  # Clear the screen
-    for column in dots:
-        for x, y, z in column:
-            size = int(3 + z)  # Dot size depends on depth
-            pygame.draw.circle(screen, (255, 255, 255), (x, y), size)
+    if RASTER_RENDER:
+        draw_dots_raster()
+        return
+    for x, y, z in zip(dot_x.ravel().tolist(), dot_y.ravel().tolist(), dot_z.ravel().tolist()):
+        size = int(DOT_BASE_SIZE + z)  # Dot size depends on depth
+        pygame.draw.circle(screen, (255, 255, 255), (x, y), size)
+
+def draw_dots_raster():
+    """Draw the whole grid as a single batch of prebuilt sprites."""
+    sizes = (DOT_BASE_SIZE + dot_z).astype(int).ravel()
+    left = (dot_x.ravel() - sizes).tolist()
+    top = (dot_y.ravel() - sizes).tolist()
+    screen.blits(
+        [(dot_sprites[size], (x, y)) for size, x, y in zip(sizes.tolist(), left, top)],
+        doreturn=False,
+    )
 
 def draw_hand_outlines(hand_landmarks_list):
-    # Create a transparent overlay surface
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    
-    for hand_landmarks in hand_landmarks_list:
-        # Extract hand points for outline
-        hand_points = [
-            (int(landmark.x * WIDTH), int(landmark.y * HEIGHT)) 
-            for landmark in hand_landmarks.landmark
-        ]
-        
-        # Draw faint outline around the hand
-        for point in hand_points:
-            pygame.draw.circle(overlay, (255, 255, 255, 50), point, 20)  # Transparent white circles
-
-        # Connect key points for a polygon effect
-        pygame.draw.polygon(overlay, (255, 255, 255, 30), hand_points[:5], width=2)  # Connect wrist and fingers
-
-    # Blit the overlay onto the main screen
-    screen.blit(overlay, (0, 0))
-
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    # Flip frame for a mirror effect
-    frame = cv2.flip(frame, 1)
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-    # Detect hands
-    result = hands.process(rgb_frame)
-    if result.multi_hand_landmarks:
-        # Update dots based on hand positions
-        update_dots(result.multi_hand_landmarks)
-
-        # Draw hand outlines
-        draw_hand_outlines(result.multi_hand_landmarks)
-
-    # Draw the dot grid
-    draw_dots()
-
-    # Update the Pygame display
-    pygame.display.flip()
-
-cap.release()
-pygame.quit()
+    # Draw on the persistent transparent overlay layer
+    with compositor.draw("hands") as overlay:
+        for hand_landmarks in hand_landmarks_list:
+            # Extract hand points for outline
+            hand_points = [
+                (int(landmark.x * WIDTH), int(landmark.y * HEIGHT))
+                for landmark in hand_landmarks.landmark
+            ]
+
+            # Draw faint outline around the hand
+            for point in hand_points:
+                overlay.mark(pygame.draw.circle(overlay.surface, (255, 255, 255, 50), point, 20))  # Transparent white circles
+
+            # Connect key points for a polygon effect
+            overlay.mark(pygame.draw.polygon(overlay.surface, (255, 255, 255, 30), hand_points[:5], width=2))  # Connect wrist and fingers
+
+def main():
+    global RASTER_RENDER
+
+    parser = argparse.ArgumentParser(description="2.5D Pin Toy")
+    landmark_log.add_arguments(parser)
+    args = parser.parse_args()
+
+    # Webcam capture and hand detection run on worker threads (or replay a recording)
+    pipeline = landmark_log.open_pipeline(
+        args, landmark_log.HANDS, lambda: make_hand_tracker(INFERENCE_SETTINGS)
+    )
+    fps = 0 if args.fast else FPS
+    landmark_filter = make_landmark_filter(FILTER_SETTINGS)
+
+    pipeline.start()
+    clock = pygame.time.Clock()
+    last_seq = -1
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                RASTER_RENDER = not RASTER_RENDER
+
+        if pipeline.finished:
+            break
+
+        # Use the freshest detection result without waiting for the camera
+        packet = pipeline.latest()
+        if packet is not None and packet.seq != last_seq:
+            last_seq = packet.seq
+            hand_landmarks_list = packet.result.multi_hand_landmarks or []
+            if landmark_filter is not None:
+                hand_landmarks_list = landmark_filter.apply(hand_landmarks_list, packet.captured_at)
+
+            # Update dots based on hand positions, once per new camera frame
+            if hand_landmarks_list:
+                update_dots(hand_landmarks_list)
+
+            # Draw hand outlines (an empty list clears them)
+            draw_hand_outlines(hand_landmarks_list)
+
+        # Draw the dot grid with the overlays on top
+        draw_dots()
+        compositor.composite(screen)
+
+        # Update the Pygame display
+        pygame.display.flip()
+        clock.tick(fps)
+
+    pipeline.stop()
+    print(pipeline.report())
+    print(compositor.report())
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
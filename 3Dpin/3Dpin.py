@@ -1,12 +1,20 @@
-import cv2
-import mediapipe as mp
+import argparse
+import os
+import sys
+
 import numpy as np
 import pygame
 import math
+import time
+from collections import OrderedDict
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import landmark_log
+from common.landmark_filter import PREDICTION, make_landmark_filter
+from common.overlay import Compositor
+from common.roi_inference import make_hand_tracker
 
-# Initialize Mediapipe and Pygame
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(min_detection_confidence=0.7, min_tracking_confidence=0.7)
+# Initialize Pygame
 pygame.init()
 
 # Screen dimensions and 3D settings
@@ -15,19 +23,34 @@ DOT_SPACING = 10  # Reduced spacing for more dots
 GRID_DEPTH = 50  # Maximum depth of the 3D grid
 FOV = 500  # Field of view for perspective projection
 DOT_RADIUS = 3
+FPS = 60  # Render cap; leaves the GIL free for the capture/inference threads
+FILTER_SETTINGS = dict(prediction=PREDICTION)  # One-Euro defaults plus look-ahead; None draws raw landmarks
+BRIGHTNESS_STEP = 4  # Brightness quantization for the dot sprite cache
+SPRITE_CACHE_SIZE = 64  # Maximum number of cached dot sprites
+SPRITE_RENDER = True  # Batched sprite path; press 's' to switch back to per-dot circles
+INCREMENTAL_UPDATE = True  # Only recompute dots near current/previous landmarks; 'i' toggles
+
+INFLUENCE_RADIUS = 100  # Landmarks further than this don't move a dot
 
-# Create a 3D grid of dots
-dots = [
-    [(x, y, GRID_DEPTH // 2) for y in range(-HEIGHT // 2, HEIGHT // 2, DOT_SPACING)]
-    for x in range(-WIDTH // 2, WIDTH // 2, DOT_SPACING)
-]
+def make_grid(spacing):
+    """Create a 3D grid of dots, stored as X/Y/Z arrays indexed [column, row]."""
+    grid_x, grid_y = np.meshgrid(
+        np.arange(-WIDTH // 2, WIDTH // 2, spacing),
+        np.arange(-HEIGHT // 2, HEIGHT // 2, spacing),
+        indexing="ij",
+    )
+    return grid_x, grid_y, np.full(grid_x.shape, GRID_DEPTH // 2, dtype=np.float64)
+
+dot_x, dot_y, dot_z = make_grid(DOT_SPACING)
+grid_dirty = True  # Dot depths changed since the last draw
+previous_regions = []  # Grid slices the hands influenced on the last incremental update
 
 # Initialize Pygame screen
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("3D Pin Toy")
+compositor = Compositor((WIDTH, HEIGHT))  # Overlay layers drawn on top of the dots
 
-# Webcam setup
-cap = cv2.VideoCapture(0)
+INFERENCE_SETTINGS = None  # Full frame; RoiHandTracker settings such as dict(scale=0.5) once measured
 
 def perspective_projection(x, y, z):
     """Project 3D coordinates into 2D using a perspective transformation."""
@@ -36,95 +59,222 @@ def perspective_projection(x, y, z):
     screen_y = int(HEIGHT // 2 + y * factor)
     return screen_x, screen_y, factor
 
+def landmark_points(hand_landmarks_list):
+    """Return every landmark of every hand as an (N, 2) array of grid coordinates."""
+    points = [
+        (int((landmark.x - 0.5) * WIDTH), int((landmark.y - 0.5) * HEIGHT))
+        for hand_landmarks in hand_landmarks_list
+        for landmark in hand_landmarks.landmark
+    ]
+    return np.array(points, dtype=np.float64).reshape(-1, 2)
+
+def influence_depth(x, y, points):
+    """Depth of the dots at x/y under the combined influence of all landmark points."""
+    # Distance from every dot to every landmark in one broadcast: (columns, rows, N)
+    dx = x[:, :, np.newaxis] - points[:, 0]
+    dy = y[:, :, np.newaxis] - points[:, 1]
+    distance = np.sqrt(dx**2 + dy**2)
+
+    # Influence decreases with distance (falloff), only close landmarks count
+    influence = np.where(distance < INFLUENCE_RADIUS, INFLUENCE_RADIUS - distance, 0).sum(axis=2)
+
+    # Push dots outward based on combined influence
+    return np.minimum(GRID_DEPTH, GRID_DEPTH // 2 + influence / 5)  # Cap depth
+
 def update_dots(hand_landmarks_list):
     """Update dot positions to reflect the shape of the hand more accurately."""
-    for i, column in enumerate(dots):
-        for j, dot in enumerate(column):
-            x, y, z = dot
-            influence = 0  # Total influence from all hand landmarks
-
-            for hand_landmarks in hand_landmarks_list:
-                for landmark in hand_landmarks.landmark:
-                    # Map hand positions to the 3D grid
-                    hand_x = int((landmark.x - 0.5) * WIDTH)  # Normalize to grid
-                    hand_y = int((landmark.y - 0.5) * HEIGHT)
-
-                    # Calculate distance from dot to landmark
-                    distance = math.sqrt((x - hand_x)**2 + (y - hand_y)**2)
-
-                    # Influence decreases with distance (falloff)
-                    if distance < 100:  # Only consider close landmarks
-                        influence += max(0, 100 - distance)  # Falloff from 100px
-
-            # Push dots outward based on combined influence
-            z_new = GRID_DEPTH // 2 + influence / 5  # Scale influence
-            dots[i][j] = (x, y, min(GRID_DEPTH, z_new))  # Cap depth
-            
+    global grid_dirty, previous_regions
+
+    if INCREMENTAL_UPDATE:
+        update_dots_incremental(hand_landmarks_list)
+        return
+
+    previous_regions = [(slice(None), slice(None))]  # Incremental mode must relax everything next
+    new_z = influence_depth(dot_x, dot_y, landmark_points(hand_landmarks_list))
+    if not np.array_equal(new_z, dot_z):
+        dot_z[:] = new_z
+        grid_dirty = True
+
+def hand_region(points):
+    """Grid slices (columns, rows) of the dots within INFLUENCE_RADIUS of the points' bounding box."""
+    origin_x, origin_y = dot_x[0, 0], dot_y[0, 0]
+    spacing_x, spacing_y = dot_x[1, 0] - origin_x, dot_y[0, 1] - origin_y
+    columns, rows = dot_x.shape
+
+    left = max(0, math.ceil((points[:, 0].min() - INFLUENCE_RADIUS - origin_x) / spacing_x))
+    right = min(columns, math.floor((points[:, 0].max() + INFLUENCE_RADIUS - origin_x) / spacing_x) + 1)
+    top = max(0, math.ceil((points[:, 1].min() - INFLUENCE_RADIUS - origin_y) / spacing_y))
+    bottom = min(rows, math.floor((points[:, 1].max() + INFLUENCE_RADIUS - origin_y) / spacing_y) + 1)
+    if left >= right or top >= bottom:
+        return None  # Hand is entirely off the grid
+    return slice(left, right), slice(top, bottom)
+
+def update_dots_incremental(hand_landmarks_list):
+    """Recompute only the dots around this frame's and last frame's hands.
+
+    Dots outside INFLUENCE_RADIUS of every landmark sit at rest, so relaxing
+    last frame's regions back to rest and recomputing this frame's regions
+    gives the same grid as a full update, at a cost proportional to hand area.
+    """
+    global grid_dirty, previous_regions
+
+    points = landmark_points(hand_landmarks_list)
+    regions = [hand_region(landmark_points([hand])) for hand in hand_landmarks_list]
+    regions = [region for region in regions if region is not None]
+    touched = previous_regions + regions
+    before = [dot_z[region].copy() for region in touched]
+
+    for region in previous_regions:
+        dot_z[region] = GRID_DEPTH // 2  # Relax back to rest
+    for region in regions:
+        dot_z[region] = influence_depth(dot_x[region], dot_y[region], points)
+
+    if any(not np.array_equal(old, dot_z[region]) for old, region in zip(before, touched)):
+        grid_dirty = True
+    previous_regions = regions
+
 def draw_hand_outlines(hand_landmarks_list):
     """Draw hand outlines to visualize the actual hand shape."""
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)  # Transparent overlay
-
-    for hand_landmarks in hand_landmarks_list:
-        hand_points = [
-            (int((landmark.x - 0.5) * WIDTH), int((landmark.y - 0.5) * HEIGHT))
-            for landmark in hand_landmarks.landmark
-        ]
-
-        # Draw lines connecting key points (fingers, palm)
-        pygame.draw.lines(overlay, (255, 255, 255, 50), True, hand_points[:5], 2)  # Palm outline
-        for i in range(5):  # Fingers
-            pygame.draw.lines(
-                overlay,
-                (255, 255, 255, 50),
-                False,
-                hand_points[i * 4 : (i + 1) * 4],
-                2,
-            )
+    with compositor.draw("hands") as overlay:  # Persistent transparent overlay
+        for hand_landmarks in hand_landmarks_list:
+            hand_points = [
+                (int((landmark.x - 0.5) * WIDTH), int((landmark.y - 0.5) * HEIGHT))
+                for landmark in hand_landmarks.landmark
+            ]
 
-        # Highlight all landmarks
-        for point in hand_points:
-            pygame.draw.circle(overlay, (255, 255, 255, 100), point, 3)
+            # Draw lines connecting key points (fingers, palm)
+            overlay.mark(pygame.draw.lines(overlay.surface, (255, 255, 255, 50), True, hand_points[:5], 2))  # Palm outline
+            for i in range(5):  # Fingers
+                overlay.mark(pygame.draw.lines(
+                    overlay.surface,
+                    (255, 255, 255, 50),
+                    False,
+                    hand_points[i * 4 : (i + 1) * 4],
+                    2,
+                ))
 
-    # Blit the overlay onto the main screen
-    screen.blit(overlay, (0, 0))
+            # Highlight all landmarks
+            for point in hand_points:
+                overlay.mark(pygame.draw.circle(overlay.surface, (255, 255, 255, 100), point, 3))
 
+def project_dots():
+    """Project the whole dot grid at once; returns flat screen x, screen y and factor arrays."""
+    factor = FOV / (FOV + dot_z.ravel())
+    screen_x = (WIDTH // 2 + dot_x.ravel() * factor).astype(int)
+    screen_y = (HEIGHT // 2 + dot_y.ravel() * factor).astype(int)
+    return screen_x, screen_y, factor
+
+sprite_cache = OrderedDict()
+
+def get_dot_sprite(size, brightness):
+    """Return a cached dot sprite, evicting the least recently used one when full."""
+    key = (size, brightness)
+    sprite = sprite_cache.get(key)
+    if sprite is not None:
+        sprite_cache.move_to_end(key)
+        return sprite
 
+    sprite = pygame.Surface((2 * size + 1, 2 * size + 1))
+    sprite.set_colorkey((0, 0, 0))
+    pygame.draw.circle(sprite, (brightness, brightness, brightness), (size, size), size)
+    sprite_cache[key] = sprite
+    if len(sprite_cache) > SPRITE_CACHE_SIZE:
+        sprite_cache.popitem(last=False)
+    return sprite
 
 def draw_dots():
     """Render the 3D dots on the screen with perspective projection."""
     screen.fill((0, 0, 0))  # Clear the screen
-    for column in dots:
-        for x, y, z in column:
-            screen_x, screen_y, factor = perspective_projection(x, y, z)
-            size = max(1, int(DOT_RADIUS * factor))  # Adjust size based on depth
-            brightness = max(50, min(255, int(255 * factor)))  # Adjust brightness
-            pygame.draw.circle(screen, (brightness, brightness, brightness), (screen_x, screen_y), size)
-
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    # Flip frame for a mirror effect
-    frame = cv2.flip(frame, 1)
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-    # Detect hands
-    result = hands.process(rgb_frame)
-    if result.multi_hand_landmarks:
-        update_dots(result.multi_hand_landmarks)
-        draw_hand_outlines(result.multi_hand_landmarks)
-
-    # Draw the 3D dot grid
-    draw_dots()
-
-    # Update the Pygame display
-    pygame.display.flip()
-
-cap.release()
-pygame.quit()
+    if not SPRITE_RENDER:
+        draw_dots_circles()
+        return
+
+    screen_x, screen_y, factor = project_dots()
+    sizes = np.maximum(1, (DOT_RADIUS * factor).astype(int))  # Adjust size based on depth
+    brightness = np.clip((255 * factor).astype(int), 50, 255)  # Adjust brightness
+    brightness = np.minimum(255, brightness // BRIGHTNESS_STEP * BRIGHTNESS_STEP)
+
+    screen.blits(
+        [
+            (get_dot_sprite(size, level), (x - size, y - size))
+            for size, level, x, y in zip(
+                sizes.tolist(), brightness.tolist(), screen_x.tolist(), screen_y.tolist()
+            )
+        ],
+        doreturn=False,
+    )
+
+def draw_dots_circles():
+    """Reference path: project and draw every dot individually."""
+    for x, y, z in zip(dot_x.ravel().tolist(), dot_y.ravel().tolist(), dot_z.ravel().tolist()):
+        screen_x, screen_y, factor = perspective_projection(x, y, z)
+        size = max(1, int(DOT_RADIUS * factor))  # Adjust size based on depth
+        brightness = max(50, min(255, int(255 * factor)))  # Adjust brightness
+        pygame.draw.circle(screen, (brightness, brightness, brightness), (screen_x, screen_y), size)
+
+def main():
+    global SPRITE_RENDER, INCREMENTAL_UPDATE, grid_dirty
+
+    parser = argparse.ArgumentParser(description="3D Pin Toy")
+    landmark_log.add_arguments(parser)
+    args = parser.parse_args()
+
+    # Webcam capture and hand detection run on worker threads (or replay a recording)
+    pipeline = landmark_log.open_pipeline(
+        args, landmark_log.HANDS, lambda: make_hand_tracker(INFERENCE_SETTINGS)
+    )
+    fps = 0 if args.fast else FPS
+    landmark_filter = make_landmark_filter(FILTER_SETTINGS)
+
+    pipeline.start()
+    clock = pygame.time.Clock()
+    last_seq = -1
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_s:
+                SPRITE_RENDER = not SPRITE_RENDER
+                grid_dirty = True
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_i:
+                INCREMENTAL_UPDATE = not INCREMENTAL_UPDATE
+
+        if pipeline.finished:
+            break
+
+        # Use the freshest detection result without waiting for the camera
+        packet = pipeline.latest()
+        if packet is not None and packet.seq != last_seq:
+            last_seq = packet.seq
+            hand_landmarks_list = packet.result.multi_hand_landmarks or []
+            if landmark_filter is not None:
+                hand_landmarks_list = landmark_filter.apply(hand_landmarks_list, packet.captured_at)
+
+            # Only new camera frames move the pins; no hands lets the grid settle back to rest
+            update_dots(hand_landmarks_list)
+            draw_hand_outlines(hand_landmarks_list)
+
+        # Skip the redraw entirely while neither the pins nor the overlay changed
+        if grid_dirty or compositor.changed:
+            # Draw the 3D dot grid, timing it so both render paths can be compared
+            draw_start = time.perf_counter()
+            draw_dots()
+            draw_ms = (time.perf_counter() - draw_start) * 1000
+            pygame.display.set_caption(
+                f"3D Pin Toy - {'sprites' if SPRITE_RENDER else 'circles'}: {draw_ms:.1f} ms"
+            )
+            compositor.composite(screen)
+
+            # Update the Pygame display
+            pygame.display.flip()
+            grid_dirty = False
+        clock.tick(fps)
+
+    pipeline.stop()
+    print(pipeline.report())
+    print(compositor.report())
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Headless frame-time benchmarks for the pin toys and the RPSLS simulation.
+
+Runs each program's per-frame functions with the SDL dummy video driver and
+synthetic inputs, sweeping dot-grid spacing and icon count. Every scenario is
+printed as one JSON object per line (frames/sec plus p50/p90/p99 per phase, in
+milliseconds) so runs can be diffed or collected to catch regressions::
+
+    python benchmarks/frame_time.py --frames 120 --spacings 20 10 5 --icons 10 20 50
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+from common.landmark_log import ReplayLandmarks
+
+
+def load_script(name, relative_path):
+    """Import one of the game scripts by file path (their folders aren't packages)."""
+    path = os.path.join(ROOT, relative_path)
+    sys.path.append(os.path.dirname(path))  # For the script's own sibling imports
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_hands(frame, num_hands=2):
+    """Two hands of 21 landmarks drifting across the frame in normalized coordinates."""
+    hands = []
+    for hand in range(num_hands):
+        t = frame / 30 + hand * math.pi
+        center_x = 0.5 + 0.3 * math.sin(t)
+        center_y = 0.5 + 0.2 * math.cos(0.7 * t)
+        angles = np.linspace(0, 2 * math.pi, 21, endpoint=False)
+        radii = 0.05 + 0.1 * (np.arange(21) % 4) / 3
+        points = np.stack(
+            [center_x + radii * np.cos(angles), center_y + radii * np.sin(angles), np.zeros(21)],
+            axis=1,
+        ).astype(np.float32)
+        hands.append(ReplayLandmarks(points))
+    return hands
+
+
+def summarize(samples):
+    values = np.array(samples) * 1000
+    return {
+        "mean": round(float(values.mean()), 4),
+        "p50": round(float(np.percentile(values, 50)), 4),
+        "p90": round(float(np.percentile(values, 90)), 4),
+        "p99": round(float(np.percentile(values, 99)), 4),
+    }
+
+
+def run_phases(phases, frames, warmup=5):
+    """Call each ``(name, fn(frame))`` in order once per frame and time them."""
+    timings = {name: [] for name, _ in phases}
+    totals = []
+    for frame in range(warmup + frames):
+        frame_start = time.perf_counter()
+        for name, phase in phases:
+            start = time.perf_counter()
+            phase(frame)
+            if frame >= warmup:
+                timings[name].append(time.perf_counter() - start)
+        if frame >= warmup:
+            totals.append(time.perf_counter() - frame_start)
+    return {
+        "fps": round(len(totals) / sum(totals), 2),
+        "frame_ms": summarize(totals),
+        "phases_ms": {name: summarize(samples) for name, samples in timings.items()},
+    }
+
+
+def draw_overlay(module, hands):
+    module.draw_hand_outlines(hands)
+    module.compositor.composite(module.screen)
+
+
+def bench_pins(module, name, spacing, frames):
+    module.dot_x, module.dot_y, module.dot_z = module.make_grid(spacing)
+    hands = [synthetic_hands(frame) for frame in range(frames + 5)]
+    result = run_phases(
+        [
+            ("update_dots", lambda frame: module.update_dots(hands[frame])),
+            ("draw_dots", lambda frame: module.draw_dots()),
+            ("draw_hand_outlines", lambda frame: draw_overlay(module, hands[frame])),
+        ],
+        frames,
+    )
+    return {"benchmark": name, "spacing": spacing, "dots": int(module.dot_x.size), **result}
+
+
+def bench_rpsls(module, icons_per_type, frames, seed=0):
+    random.seed(seed)
+    icons = module.create_icons(icons_per_type)
+    screen = module.pygame.Surface((module.WIDTH, module.HEIGHT))
+
+    def move(frame):
+        for icon in icons:
+            icon.move()
+
+    def draw(frame):
+        screen.fill((255, 255, 255))
+        for icon in icons:
+            icon.draw(screen)
+
+    def collide(frame):
+        module.handle_collisions(icons)
+
+    renderer = module.IconRenderer(module.pygame.display.get_surface(), module.TYPE_IMAGES, mode="icons")
+
+    def render(frame):
+        renderer.draw(*module.icon_state(icons))
+
+    result = run_phases(
+        [("move", move), ("draw", draw), ("render", render), ("handle_collisions", collide)], frames
+    )
+    return {"benchmark": "rpsls", "icons_per_type": icons_per_type, "icons": len(icons), **result}
+
+
+def bench_rpsls_arrays(module, icons_per_type, world, frames, seed=0):
+    """The struct-of-arrays engine on a ``world`` x ``world`` field (the window is too small for 50k icons)."""
+    from rpsls_arrays import ArraySimulation, beats_matrix
+
+    size = module.ICON_WIDTH
+    starts = {
+        "rock": (0, 0),
+        "paper": (world - size, 0),
+        "scissors": (0, world - size),
+        "lizard": (world - size, world - size),
+        "spock": (world // 2 - size // 2, world // 2 - size // 2),
+    }
+    simulation = ArraySimulation.from_start_positions(
+        icons_per_type, starts, world, world, size, module.ICON_HEIGHT, beats_matrix(module.RPSLS_RULES), seed
+    )
+    # Start from an evenly mixed field rather than five dense clumps
+    simulation.x = simulation.rng.uniform(0, world - size, len(simulation))
+    simulation.y = simulation.rng.uniform(0, world - size, len(simulation))
+
+    result = run_phases(
+        [("move", lambda frame: simulation.move()), ("collide", lambda frame: simulation.collide())], frames
+    )
+    return {"benchmark": "rpsls_arrays", "icons": len(simulation), "world": world, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=120, help="measured frames per scenario")
+    parser.add_argument("--spacings", type=int, nargs="*", default=[20, 10, 5], help="dot grid spacings")
+    parser.add_argument("--icons", type=int, nargs="*", default=[10, 20, 50], help="RPSLS icons per type")
+    parser.add_argument("--array-icons", type=int, nargs="*", default=[1000, 10000], help="array engine icons per type")
+    parser.add_argument("--array-world", type=int, default=8000, help="array engine field size in pixels")
+    parser.add_argument("--output", metavar="FILE", help="also append the JSON lines to FILE")
+    args = parser.parse_args()
+
+    results = []
+    for name, path in (("3Dpin", "3Dpin/3Dpin.py"), ("2Dpin", "3Dpin/2Dpin.py")):
+        module = load_script(name, path)
+        for spacing in args.spacings:
+            results.append(bench_pins(module, name, spacing, args.frames))
+            print(json.dumps(results[-1]), flush=True)
+
+    rpsls = load_script("RPSLS_game", "rockpaperscissorslizardspock/RPSLS_game.py")
+    rpsls.pygame.display.set_mode((rpsls.WIDTH, rpsls.HEIGHT))
+    for icons_per_type in args.icons:
+        results.append(bench_rpsls(rpsls, icons_per_type, args.frames))
+        print(json.dumps(results[-1]), flush=True)
+    for icons_per_type in args.array_icons:
+        results.append(bench_rpsls_arrays(rpsls, icons_per_type, args.array_world, args.frames))
+        print(json.dumps(results[-1]), flush=True)
+
+    if args.output:
+        with open(args.output, "a") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
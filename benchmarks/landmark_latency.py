@@ -0,0 +1,178 @@
+"""Lag and jitter the landmark filter adds, with and without prediction.
+
+Replays a landmark log (or, without ``--replay``, a synthetic noisy hand)
+through ``ReplayPipeline`` and treats the recorded landmarks as the true hand
+position at their timestamps. Lags are the time shift that best lines up the
+shown landmarks with that truth: smoothing makes them positive (the shown
+hand trails the real one), and prediction pulls them towards zero or below
+(leading).
+
+``filter_lag_ms`` covers the filter alone. The end-to-end figures replay the
+log in real time through 3Dpin's own loop (filter, ``update_dots``, draw,
+composite, ``pygame.display.flip()``) with the SDL dummy driver:
+``capture_to_photon_ms`` is each flip's age against the packet's capture
+time, and ``motion_to_photon_ms`` is the lag of what was flipped against the
+true hand at the flip. A replay has no camera or inference, so
+``--capture-ms`` adds a live run's capture-to-render age (``CapturePipeline``
+reports it) to both. Jitter is the RMS frame-to-frame acceleration::
+
+    python benchmarks/landmark_latency.py --replay session.lml --predictions 0.015 0.03 0.05
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from frame_time import load_script, summarize
+from common.landmark_filter import OneEuroFilter, make_landmark_filter
+from common.landmark_log import HANDS, LandmarkRecorder, ReplayLandmarks, ReplayPipeline
+
+
+def write_synthetic_log(path, seconds=20.0, rate=30.0, noise=0.003, seed=0):
+    """A 21-landmark hand sweeping across the frame, with tracker-like noise."""
+    rng = np.random.default_rng(seed)
+    offsets = rng.uniform(-0.08, 0.08, size=(21, 2))
+    recorder = LandmarkRecorder(path, HANDS)
+    for frame in range(int(seconds * rate)):
+        t = frame / rate
+        center = np.array([0.5 + 0.25 * math.sin(2 * math.pi * 0.5 * t), 0.5 + 0.15 * math.sin(2 * math.pi * 0.3 * t)])
+        points = np.zeros((21, 3), dtype=np.float32)
+        points[:, :2] = center + offsets + rng.normal(0, noise, size=(21, 2))
+        result = SimpleNamespace(multi_hand_landmarks=[ReplayLandmarks(points)])
+        recorder.write(t, result, (480, 640, 3))
+    recorder.close()
+
+
+def replay_frames(path):
+    """(timestamps, points) for every frame of the log with exactly one hand."""
+    pipeline = ReplayPipeline(path, realtime=False).start()
+    timestamps, points = [], []
+    while not pipeline.finished:
+        packet = pipeline.latest()
+        hands = packet.result.multi_hand_landmarks
+        if hands and len(hands) == 1:
+            timestamps.append(float(pipeline.log.timestamps[packet.seq]))
+            points.append(hands[0].points[:, :2])
+    return np.array(timestamps), np.array(points, dtype=np.float64)
+
+
+def filter_lag(timestamps, truth, shown, shown_times=None, max_lag=0.3, step=0.001):
+    """Shift (s) minimizing the mean distance between shown and true positions; negative when shown leads.
+
+    ``shown_times`` defaults to ``timestamps``; pass the flip times to measure what reached the screen.
+    """
+    if shown_times is None:
+        shown_times = timestamps
+    flat_truth = truth.reshape(len(truth), -1)
+    flat_shown = shown.reshape(len(shown), -1)
+    best_lag, best_error = 0.0, float("inf")
+    for lag in np.arange(-max_lag, max_lag, step):
+        sample_times = shown_times - lag
+        valid = (sample_times >= timestamps[0]) & (sample_times <= timestamps[-1])
+        true_at = np.stack(
+            [np.interp(sample_times[valid], timestamps, column) for column in flat_truth.T], axis=1
+        )
+        error = np.abs(flat_shown[valid] - true_at).mean()
+        if error < best_error:
+            best_lag, best_error = lag, error
+    return best_lag
+
+
+def replay_render(pin, path, settings, capture_s=0.0):
+    """Play the log in real time through 3Dpin's frame loop.
+
+    Returns (capture times, flip times, shown points) for the frames showing
+    exactly one hand, all on the replay's clock.
+    """
+    pipeline = ReplayPipeline(path, realtime=True).start()
+    landmark_filter = make_landmark_filter(settings)
+    origin = pipeline.log.timestamps[0] - pipeline.latest().captured_at  # Replay clock minus perf_counter
+    clock = pin.pygame.time.Clock()
+    captured, flipped, shown = [], [], []
+    last_seq = -1
+    while not pipeline.finished:
+        pin.pygame.event.pump()
+        packet = pipeline.latest()
+        if packet is not None and packet.seq != last_seq:
+            last_seq = packet.seq
+            hand_landmarks_list = packet.result.multi_hand_landmarks or []
+            if landmark_filter is not None:
+                hand_landmarks_list = landmark_filter.apply(hand_landmarks_list, packet.captured_at)
+            pin.update_dots(hand_landmarks_list)
+            pin.draw_hand_outlines(hand_landmarks_list)
+
+        if pin.grid_dirty or pin.compositor.changed:
+            pin.draw_dots()
+            pin.compositor.composite(pin.screen)
+            pin.pygame.display.flip()
+            pin.grid_dirty = False
+            if packet is not None and len(hand_landmarks_list) == 1:
+                captured.append(packet.captured_at + origin)
+                flipped.append(time.perf_counter() + origin + capture_s)
+                shown.append(hand_landmarks_list[0].points[:, :2])
+        clock.tick(pin.FPS)
+    return np.array(captured), np.array(flipped), np.array(shown, dtype=np.float64)
+
+
+def evaluate(name, timestamps, points, settings, rendered=None):
+    if settings is None:
+        shown = points
+    else:
+        one_euro = OneEuroFilter(**settings)
+        shown = np.array([one_euro(frame, t) for frame, t in zip(points, timestamps)])
+
+    lag = filter_lag(timestamps, points, shown)
+    acceleration = np.diff(shown, n=2, axis=0)
+    result = {
+        "mode": name,
+        "settings": settings,
+        "filter_lag_ms": round(lag * 1000, 1),
+        "jitter": float(np.sqrt((acceleration**2).sum(axis=-1).mean())),
+    }
+    if rendered is not None:
+        captured, flipped, flipped_points = rendered
+        result["frames"] = len(flipped)
+        result["capture_to_photon_ms"] = summarize(flipped - captured)
+        motion = filter_lag(timestamps, points, flipped_points, shown_times=flipped)
+        result["motion_to_photon_ms"] = round(motion * 1000, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replay", metavar="FILE", help="landmark log to replay (default: synthetic hand)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="length of the synthetic hand log")
+    parser.add_argument(
+        "--predictions", type=float, nargs="+", default=[0.015, 0.05], help="seconds of velocity prediction to try"
+    )
+    parser.add_argument("--min-cutoff", type=float, default=1.0)
+    parser.add_argument("--beta", type=float, default=10.0)
+    parser.add_argument("--capture-ms", type=float, default=0.0, help="live capture-to-render age to add")
+    parser.add_argument("--filter-only", action="store_true", help="skip the real-time 3Dpin replay")
+    args = parser.parse_args()
+
+    path = args.replay
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "synthetic.lml")
+        write_synthetic_log(path, seconds=args.seconds)
+    timestamps, points = replay_frames(path)
+    pin = None if args.filter_only else load_script("pin3d", "3Dpin/3Dpin.py")
+
+    smoothing = dict(min_cutoff=args.min_cutoff, beta=args.beta)
+    modes = [("raw", None), ("filtered", dict(smoothing, prediction=0.0))]
+    modes += [("filtered+predicted", dict(smoothing, prediction=prediction)) for prediction in args.predictions]
+    for name, settings in modes:
+        rendered = None if pin is None else replay_render(pin, path, settings, args.capture_ms / 1000)
+        print(json.dumps(evaluate(name, timestamps, points, settings, rendered)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
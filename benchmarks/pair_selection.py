@@ -0,0 +1,99 @@
+"""Exact ``select_elements`` versus the old greedy pass, on generated instances.
+
+Each instance has ``keys`` keys, each offered ``pairs`` pairs of numbers
+from ``1..numbers``. One pair per key is planted so that a valid choice
+always exists; the rest are random, and ``--overlap`` makes the decoys
+crowd around the planted numbers so that the first free pair is usually
+the wrong one. Checks every exact answer, counts how often greedy gives up,
+and prints the solve times as JSON lines::
+
+    python benchmarks/pair_selection.py --keys 100 200 500 --instances 20
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from frame_time import load_script, summarize
+
+
+def instance(keys, pairs, numbers, overlap, rng):
+    """``{key: [pairs]}`` with a planted solution hidden at a random position in each list."""
+    planted = rng.sample(range(1, numbers + 1), 2 * keys)
+    hot = planted[:max(2, int(len(planted) * overlap))]  # Numbers the decoys prefer
+    problem = {}
+    for key in range(keys):
+        options = []
+        while len(options) < pairs - 1:
+            first = rng.choice(hot) if rng.random() < overlap else rng.randint(1, numbers)
+            second = rng.randint(1, numbers)
+            if first != second:
+                options.append((first, second))
+        options.insert(rng.randrange(pairs), (planted[2 * key], planted[2 * key + 1]))
+        problem[f"k{key}"] = options
+    return problem
+
+
+def greedy(problem):
+    """The first-free-pair pass ``select_elements`` used to be."""
+    result = {}
+    used = set()
+    for key, pairs in problem.items():
+        for pair in pairs:
+            if pair[0] not in used and pair[1] not in used:
+                result[key] = pair
+                used.update(pair)
+                break
+    return result if len(used) == len(problem) * 2 else None
+
+
+def valid(problem, result):
+    numbers = [number for pair in result.values() for number in pair]
+    return (
+        result.keys() == problem.keys()
+        and all(pair in problem[key] for key, pair in result.items())
+        and len(set(numbers)) == len(numbers)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, nargs="*", default=[50, 100, 200, 500])
+    parser.add_argument("--pairs", type=int, default=6, help="pairs offered per key")
+    parser.add_argument("--spread", type=float, default=2.5, help="numbers to draw from, per number needed")
+    parser.add_argument("--overlap", type=float, default=0.5, help="share of decoys aimed at planted numbers")
+    parser.add_argument("--instances", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    permutations = load_script("permutations", "durak/permutations.py")
+    rng = random.Random(args.seed)
+    for keys in args.keys:
+        exact_times, greedy_times = [], []
+        greedy_failed = 0
+        for _ in range(args.instances):
+            problem = instance(keys, args.pairs, int(2 * keys * args.spread), args.overlap, rng)
+            start = time.perf_counter()
+            result = permutations.select_elements(problem)
+            exact_times.append(time.perf_counter() - start)
+            assert result is not None and valid(problem, result)
+
+            start = time.perf_counter()
+            greedy_failed += greedy(problem) is None
+            greedy_times.append(time.perf_counter() - start)
+
+        print(json.dumps({
+            "keys": keys,
+            "instances": args.instances,
+            "exact_ms": summarize(exact_times),
+            "greedy_ms": summarize(greedy_times),
+            "greedy_failed": greedy_failed,
+        }), flush=True)
+
+
+if __name__ == "__main__":
+    main()
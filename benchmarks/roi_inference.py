@@ -0,0 +1,105 @@
+"""CPU time and landmark error of downscaled / ROI-cropped hand inference.
+
+Reads frames from a video file (or a camera index), runs MediaPipe Hands on
+each frame at full resolution as the reference, and again through
+``RoiHandTracker`` at each ``--scales`` setting. Every mode gets its own
+``Hands`` instance so their internal tracking doesn't interfere. Reports CPU
+milliseconds per frame and the mean landmark distance from the full-frame
+result in pixels, one JSON object per mode::
+
+    python benchmarks/roi_inference.py --video hands.mp4 --frames 300 --scales 1.0 0.5 0.25
+
+Needs MediaPipe, OpenCV and real hand footage; there is no synthetic
+fallback, and a landmark log (.lml) can't stand in for the video because it
+holds no frames. No results from this benchmark have been recorded yet, so
+the apps run full-frame inference (``INFERENCE_SETTINGS = None``) until it
+has been run on real footage.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+from common.landmark_filter import landmark_array
+from common.roi_inference import make_hand_tracker
+
+
+def read_frames(source, count):
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames
+
+
+def run(process, frames):
+    """Landmark arrays (or None) per frame, and CPU ms per frame."""
+    results = []
+    start = time.process_time()
+    for frame in frames:
+        hands = process(frame).multi_hand_landmarks
+        results.append(np.stack([landmark_array(hand)[:, :2] for hand in hands]) if hands else None)
+    return results, (time.process_time() - start) * 1000 / len(frames)
+
+
+def landmark_error(reference, results, frame_shape):
+    """Mean pixel distance to the reference where both found the same number of hands."""
+    height, width = frame_shape[:2]
+    errors, mismatched = [], 0
+    for expected, actual in zip(reference, results):
+        if expected is None and actual is None:
+            continue
+        if expected is None or actual is None or len(expected) != len(actual):
+            mismatched += 1
+            continue
+        # Hands may come back in a different order; pair each with its nearest reference hand
+        for hand in actual:
+            distances = [np.linalg.norm((hand - other) * (width, height), axis=1).mean() for other in expected]
+            errors.append(min(distances))
+    return (float(np.mean(errors)) if errors else None), mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", default="0", help="video file or camera index")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--scales", type=float, nargs="*", default=[1.0, 0.5, 0.25])
+    parser.add_argument("--padding", type=float, default=0.3)
+    parser.add_argument("--roi-size", type=int, default=256)
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.frames)
+    if not frames:
+        sys.exit(f"no frames read from {args.video}")
+
+    reference, reference_ms = run(make_hand_tracker(), frames)
+    print(json.dumps({"mode": "full_frame", "cpu_ms_per_frame": round(reference_ms, 2)}), flush=True)
+
+    for scale in args.scales:
+        tracker = make_hand_tracker(dict(scale=scale, padding=args.padding, roi_size=args.roi_size))
+        results, cpu_ms = run(tracker, frames)
+        error, mismatched = landmark_error(reference, results, frames[0].shape)
+        print(json.dumps({
+            "mode": "roi",
+            "scale": scale,
+            "cpu_ms_per_frame": round(cpu_ms, 2),
+            "speedup": round(reference_ms / cpu_ms, 2),
+            "landmark_error_px": None if error is None else round(error, 2),
+            "hand_count_mismatches": mismatched,
+            **tracker.stats(),
+        }), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Collision-phase time of the RPSLS all-pairs loop versus the spatial hash.
+
+For each icon count, runs the same seeded simulation (move + collisions)
+with both broad phases, checks that positions, velocities and types come
+out identical, and prints the per-frame collision time as JSON lines::
+
+    python benchmarks/rpsls_collisions.py --icons 20 50 100 500 --frames 30
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from frame_time import load_script, summarize
+
+
+def simulate(game, icons_per_type, frames, spatial, seed):
+    game.SPATIAL_HASH = spatial
+    random.seed(seed)
+    icons = game.create_icons(icons_per_type)
+    timings = []
+    for _ in range(frames):
+        for icon in icons:
+            icon.move()
+        start = time.perf_counter()
+        game.handle_collisions(icons)
+        timings.append(time.perf_counter() - start)
+    state = [(icon.x, icon.y, icon.vx, icon.vy, icon.type) for icon in icons]
+    return state, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--icons", type=int, nargs="*", default=[20, 50, 100, 200, 500], help="icons per type")
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--max-all-pairs", type=int, default=1000, help="skip all-pairs above this many icons")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    game = load_script("RPSLS_game", "rockpaperscissorslizardspock/RPSLS_game.py")
+    for icons_per_type in args.icons:
+        total = icons_per_type * len(game.start_positions)
+        spatial_state, spatial_times = simulate(game, icons_per_type, args.frames, True, args.seed)
+        result = {"icons": total, "spatial_hash_ms": summarize(spatial_times)}
+        if total <= args.max_all_pairs:
+            pairs_state, pairs_times = simulate(game, icons_per_type, args.frames, False, args.seed)
+            result["all_pairs_ms"] = summarize(pairs_times)
+            result["speedup"] = round(float(np.mean(pairs_times) / np.mean(spatial_times)), 2)
+            result["identical"] = spatial_state == pairs_state
+        print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
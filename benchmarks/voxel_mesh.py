@@ -0,0 +1,70 @@
+"""Meshing time and size of sculpting's exposed-face mesher, headless.
+
+For each grid size, builds a lumpy clay blob (a sphere plus random bumps
+and holes), meshes it with and without row merging, checks that both cover
+the same exposed area, and compares the triangle count against drawing
+every solid voxel as a 12-triangle cube, as ``draw_clay`` used to::
+
+    python benchmarks/voxel_mesh.py --sizes 20 64 128 256
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from frame_time import load_script, summarize
+
+
+def clay_blob(size, seed=0):
+    """Boolean ``size``³ grid: a ball filling most of it, with bumps added and holes carved."""
+    rng = np.random.default_rng(seed)
+    center = (size - 1) / 2
+    x, y, z = np.ogrid[:size, :size, :size]
+    distance = np.sqrt((x - center) ** 2 + (y - center) ** 2 + (z - center) ** 2)
+    solid = distance < size * 0.4
+    for _ in range(20):
+        bump = rng.uniform(0, size, 3)
+        radius = rng.uniform(0.05, 0.12) * size
+        inside = (x - bump[0]) ** 2 + (y - bump[1]) ** 2 + (z - bump[2]) ** 2 < radius ** 2
+        solid = solid ^ inside if rng.random() < 0.5 else solid | inside
+    return solid
+
+
+def quad_area(mesh):
+    triangles = mesh.vertices[mesh.indices].reshape(-1, 3, 3)
+    return float(np.linalg.norm(np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]), axis=1).sum() / 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=[20, 64, 128, 256])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    voxel_mesh = load_script("voxel_mesh", "sculpting/voxel_mesh.py")
+    for size in args.sizes:
+        solid = clay_blob(size, args.seed)
+        result = {"size": size, "voxels": int(solid.sum()), "cube_triangles": int(solid.sum()) * 12}
+        areas = []
+        for merge in (False, True):
+            times = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                mesh = voxel_mesh.mesh_voxels(solid, merge=merge)
+                times.append(time.perf_counter() - start)
+            name = "merged" if merge else "faces"
+            result[f"{name}_triangles"] = len(mesh.indices) // 3
+            result[f"{name}_ms"] = summarize(times)
+            areas.append(quad_area(mesh))
+        result["same_area"] = abs(areas[0] - areas[1]) < 1e-3 * areas[0]
+        print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Memory and remesh time of sculpting's chunked voxel store on large grids.
+
+For each grid size, writes a clay ball into a ``ChunkedVoxels`` store one
+slab at a time (so no dense copy of the grid is ever made), meshes it all
+once, then times single-voxel and brush-sized sculpting strokes followed by
+``ChunkedMesh.update()``, which only remeshes the dirty chunks. Memory is
+compared with the dense float64 array ``sculpting.py`` used to keep::
+
+    python benchmarks/voxel_store.py --sizes 128 256 512
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from frame_time import load_script, summarize
+
+
+def fill_ball(voxels, radius):
+    """Write a ball of clay at the grid's centre, slab by slab along x."""
+    size = voxels.shape[0]
+    center = (size - 1) / 2
+    for x0 in range(0, size, voxels.chunk):
+        x, y, z = np.ogrid[x0:min(x0 + voxels.chunk, size), :size, :size]
+        voxels.write((x0, 0, 0), ((x - center) ** 2 + (y - center) ** 2 + (z - center) ** 2 < radius ** 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=[128, 256, 512])
+    parser.add_argument("--fill", type=float, default=0.3, help="ball radius as a share of the grid size")
+    parser.add_argument("--chunk", type=int, default=16)
+    parser.add_argument("--strokes", type=int, default=50)
+    parser.add_argument("--brush", type=int, default=6, help="side of the cube a brush stroke writes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    voxel_store = load_script("voxel_store", "sculpting/voxel_store.py")
+    voxel_mesh = load_script("voxel_mesh", "sculpting/voxel_mesh.py")
+    rng = np.random.default_rng(args.seed)
+    for size in args.sizes:
+        voxels = voxel_store.ChunkedVoxels((size, size, size), args.chunk)
+        start = time.perf_counter()
+        fill_ball(voxels, size * args.fill)
+        fill_time = time.perf_counter() - start
+        surface = voxel_mesh.ChunkedMesh(voxels)
+        start = time.perf_counter()
+        mesh = surface.update()
+        mesh_time = time.perf_counter() - start
+
+        # Strokes around the ball's surface, where sculpting happens
+        center = (size - 1) / 2
+        directions = rng.normal(size=(args.strokes, 3))
+        directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+        points = np.clip(center + directions * size * args.fill, 0, size - args.brush).astype(int)
+        voxel_times, brush_times, remeshed = [], [], []
+        for point in points:
+            start = time.perf_counter()
+            voxels[point] += 1
+            surface.update()
+            voxel_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            voxels.write(point, np.full((args.brush,) * 3, 2))
+            surface.update()
+            brush_times.append(time.perf_counter() - start)
+            remeshed.append(surface.remeshed)
+
+        print(json.dumps({
+            "size": size,
+            "chunks": len(voxels.chunks),
+            "store_mib": voxels.nbytes / 2 ** 20,
+            "dense_float64_mib": size ** 3 * 8 / 2 ** 20,
+            "fill_s": round(fill_time, 3),
+            "full_mesh_s": round(mesh_time, 3),
+            "triangles": len(mesh.indices) // 3,
+            "voxel_stroke_ms": summarize(voxel_times),
+            "brush_stroke_ms": summarize(brush_times),
+            "brush_chunks_remeshed": float(np.mean(remeshed)),
+        }), flush=True)
+
+
+if __name__ == "__main__":
+    main()
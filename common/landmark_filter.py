@@ -0,0 +1,98 @@
+"""Adaptive smoothing and short-horizon prediction for tracked landmarks.
+
+MediaPipe landmarks jitter from frame to frame, and by the time a result is
+drawn the hand has already moved on by the capture + inference latency.
+``LandmarkFilter`` runs a One-Euro filter (a low-pass whose cutoff rises
+with speed: heavy smoothing when still, little lag when moving) over every
+coordinate of every landmark at once, then optionally extrapolates along the
+filtered velocity to where the hand should be ``prediction`` seconds later.
+"""
+
+import math
+
+import numpy as np
+
+from common.landmark_log import ReplayLandmarks
+
+PREDICTION = 0.015  # Look-ahead (s) for the pin toys: cancels the filter lag, see benchmarks/landmark_latency.py
+
+
+def smoothing_factor(cutoff, dt):
+    """Exponential smoothing factor for a low-pass with the given cutoff (Hz)."""
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """Vectorized One-Euro filter over an array of points of fixed shape.
+
+    ``min_cutoff`` (Hz) sets the smoothing of a still hand, ``beta`` how fast
+    the cutoff rises with speed (in landmark units per second), ``d_cutoff``
+    the smoothing of the velocity estimate. Points are ``(..., 3)`` arrays and
+    speed is measured per point over its x/y/z.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=10.0, d_cutoff=1.0, prediction=0.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.prediction = prediction  # Seconds to extrapolate ahead along the velocity
+        self.reset()
+
+    def reset(self):
+        self._points = None
+        self._velocity = None
+        self._timestamp = None
+
+    def __call__(self, points, timestamp):
+        points = np.asarray(points, dtype=np.float64)
+        if self._points is None or self._points.shape != points.shape or timestamp <= self._timestamp:
+            # First frame, or the number of tracked hands changed: start over
+            self._points = points.copy()
+            self._velocity = np.zeros_like(points)
+            self._timestamp = timestamp
+            return points
+
+        dt = timestamp - self._timestamp
+        self._timestamp = timestamp
+
+        velocity = (points - self._points) / dt
+        self._velocity += smoothing_factor(self.d_cutoff, dt) * (velocity - self._velocity)
+
+        speed = np.linalg.norm(self._velocity, axis=-1, keepdims=True)
+        cutoff = self.min_cutoff + self.beta * speed
+        tau = 1.0 / (2 * math.pi * cutoff)
+        alpha = 1.0 / (1.0 + tau / dt)
+        self._points += alpha * (points - self._points)
+
+        if self.prediction:
+            return self._points + self._velocity * self.prediction
+        return self._points.copy()
+
+
+class LandmarkFilter:
+    """Filter a list of MediaPipe landmark lists (e.g. ``multi_hand_landmarks``)."""
+
+    def __init__(self, **settings):
+        self.filter = OneEuroFilter(**settings)
+
+    def apply(self, landmarks_list, timestamp):
+        """Return the filtered landmarks as ``ReplayLandmarks``; an empty list resets the filter."""
+        if not landmarks_list:
+            self.filter.reset()
+            return []
+        points = np.stack([landmark_array(landmarks) for landmarks in landmarks_list])
+        filtered = self.filter(points, timestamp).astype(np.float32)
+        return [ReplayLandmarks(item) for item in filtered]
+
+
+def make_landmark_filter(settings=None):
+    """``LandmarkFilter(**settings)``, or None (draw raw landmarks) if ``settings`` is None."""
+    return LandmarkFilter(**settings) if settings is not None else None
+
+
+def landmark_array(landmarks):
+    """(landmarks, 3) array for a MediaPipe landmark list or a ``ReplayLandmarks``."""
+    if isinstance(landmarks, ReplayLandmarks):
+        return landmarks.points
+    return np.array([(lm.x, lm.y, lm.z) for lm in landmarks.landmark])
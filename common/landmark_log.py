@@ -0,0 +1,202 @@
+"""Record MediaPipe landmarks to a compact binary log and replay them without a camera.
+
+A log is a 32-byte header followed by fixed-size records, so it can be
+memory-mapped with NumPy no matter how long the session was::
+
+    header:  8s magic, then uint32 version, kind, landmarks, max_items,
+             frame width, frame height, reserved
+    record:  float64 timestamp (seconds since the first record),
+             uint32 item count, uint32 padding,
+             float32[max_items, landmarks, 3] x/y/z (unused items are zero)
+
+``kind`` says which MediaPipe result field the items belong to: hands
+(``multi_hand_landmarks``, 21 landmarks, up to 2 hands) or face mesh
+(``multi_face_landmarks``, 478 refined landmarks, 1 face).
+"""
+
+import os
+import struct
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from common.pipeline import CapturePipeline, Packet
+
+MAGIC = b"LMLOG\x00\x00\x00"
+VERSION = 1
+HEADER = struct.Struct("<8s7I")
+
+HANDS = 0
+FACE = 1
+KINDS = {
+    HANDS: ("multi_hand_landmarks", 21, 2),
+    FACE: ("multi_face_landmarks", 478, 1),
+}
+
+Landmark = namedtuple("Landmark", "x y z")
+
+
+def record_dtype(landmarks, max_items):
+    return np.dtype([
+        ("timestamp", "<f8"),
+        ("count", "<u4"),
+        ("pad", "<u4"),
+        ("points", "<f4", (max_items, landmarks, 3)),
+    ])
+
+
+class ReplayLandmarks:
+    """Stands in for a MediaPipe ``NormalizedLandmarkList``."""
+
+    def __init__(self, points):
+        self.points = points  # (landmarks, 3) float32 view into the log
+        self.landmark = [Landmark(*point) for point in points.tolist()]
+
+
+class ReplayResult:
+    """Stands in for a MediaPipe ``process()`` result; empty fields are None, like MediaPipe's."""
+
+    def __init__(self, kind, items):
+        self.multi_hand_landmarks = None
+        self.multi_face_landmarks = None
+        if items:
+            setattr(self, KINDS[kind][0], items)
+
+
+class LandmarkRecorder:
+    """Append one record per processed frame with buffered writes."""
+
+    def __init__(self, path, kind):
+        self.kind = kind
+        _, self.landmarks, self.max_items = KINDS[kind]
+        self.dtype = record_dtype(self.landmarks, self.max_items)
+        self._file = open(path, "wb")
+        self._start = None
+
+    def write(self, timestamp, result, frame_shape):
+        if self._start is None:
+            self._start = timestamp
+            height, width = frame_shape[:2]
+            self._file.write(HEADER.pack(
+                MAGIC, VERSION, self.kind, self.landmarks, self.max_items, width, height, 0
+            ))
+
+        record = np.zeros((), dtype=self.dtype)
+        record["timestamp"] = timestamp - self._start
+        items = getattr(result, KINDS[self.kind][0]) or []
+        items = items[: self.max_items]
+        record["count"] = len(items)
+        for i, item in enumerate(items):
+            record["points"][i] = [(lm.x, lm.y, lm.z) for lm in item.landmark[: self.landmarks]]
+        self._file.write(record.tobytes())
+
+    def close(self):
+        self._file.close()
+
+
+class LandmarkLog:
+    """Memory-mapped reader for a landmark log."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+        magic, version, self.kind, landmarks, max_items, width, height, _ = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} landmark log")
+        self.frame_shape = (height, width, 3)
+
+        # A log cut short mid-record (e.g. the program was killed) just loses its last frame
+        dtype = record_dtype(landmarks, max_items)
+        count = (os.path.getsize(path) - HEADER.size) // dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=dtype, mode="r", offset=HEADER.size, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=dtype)
+        self.timestamps = self.records["timestamp"]
+
+    def __len__(self):
+        return len(self.records)
+
+    def points(self, index):
+        """Landmarks of frame ``index`` as a (count, landmarks, 3) array."""
+        record = self.records[index]
+        return record["points"][: record["count"]]
+
+    def result(self, index):
+        return ReplayResult(self.kind, [ReplayLandmarks(item) for item in self.points(index)])
+
+
+class ReplayPipeline:
+    """Drop-in replacement for ``CapturePipeline`` that plays back a landmark log.
+
+    With ``realtime`` each call to ``latest()`` returns the newest frame whose
+    timestamp has passed; otherwise every call advances to the next frame, so
+    the program runs as fast as it can consume them.
+    """
+
+    def __init__(self, path, realtime=True):
+        self.log = LandmarkLog(path)
+        self.realtime = realtime
+        self.finished = len(self.log) == 0
+        self._blank = np.zeros(self.log.frame_shape, dtype=np.uint8)
+        self._index = -1
+        self._packet = None
+        self._start = None
+        self._skipped = 0
+
+    def start(self):
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self):
+        pass
+
+    def latest(self):
+        if self.finished:
+            return self._packet
+        if self.realtime:
+            elapsed = time.perf_counter() - self._start
+            index = int(np.searchsorted(self.log.timestamps, elapsed, side="right")) - 1
+            if index <= self._index:
+                return self._packet
+            self._skipped += index - self._index - 1
+        else:
+            index = self._index + 1
+        if index >= len(self.log) - 1:
+            index = len(self.log) - 1
+            self.finished = True
+
+        self._index = index
+        # Timestamps follow the recording's clock, so filters see the real frame spacing
+        packet = Packet(index, self._blank, self._start + float(self.log.timestamps[index]), 0.0)
+        packet.result = self.log.result(index)
+        self._packet = packet
+        return packet
+
+    def stats(self):
+        return {"replayed": self._index + 1, "frames": len(self.log), "skipped": self._skipped}
+
+    def report(self):
+        stats = self.stats()
+        return f"replayed {stats['replayed']}/{stats['frames']} frames, skipped {stats['skipped']}"
+
+
+def add_arguments(parser):
+    """Add the shared ``--record`` / ``--replay`` / ``--fast`` options to an argparse parser."""
+    parser.add_argument("--record", metavar="FILE", help="save tracked landmarks to FILE")
+    parser.add_argument("--replay", metavar="FILE", help="replay landmarks from FILE instead of the webcam")
+    parser.add_argument("--fast", action="store_true", help="replay at full speed instead of the recorded rate")
+
+
+def open_pipeline(args, kind, make_process):
+    """Replay ``args.replay`` if given, otherwise run ``make_process()`` on the webcam.
+
+    ``make_process`` is only called for live runs, so replays work without
+    MediaPipe installed.
+    """
+    if args.replay:
+        return ReplayPipeline(args.replay, realtime=not args.fast)
+    recorder = LandmarkRecorder(args.record, kind) if args.record else None
+    return CapturePipeline(cv2.VideoCapture(0), make_process(), recorder=recorder)
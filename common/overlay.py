@@ -0,0 +1,92 @@
+"""Persistent translucent overlay layers composited over the main screen.
+
+Allocating a full-screen ``SRCALPHA`` surface every frame and alpha-blending
+all of it costs far more than the few lines drawn on it. A ``Compositor``
+keeps one surface per layer for the life of the program, clears only the
+rectangle that was drawn on last time, and blits only the rectangle drawn on
+this time. It also keeps per-layer draw and blit timings::
+
+    with compositor.draw("hands") as layer:
+        layer.mark(pygame.draw.circle(layer.surface, (255, 255, 255, 100), point, 3))
+    ...
+    compositor.composite(screen)
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pygame
+
+CLEAR = (0, 0, 0, 0)
+
+
+class OverlayLayer:
+    def __init__(self, size):
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.rect = None  # Area drawn on since the layer was last cleared
+        self.changed = False  # Drawn on or cleared since the last composite
+
+    def clear(self):
+        if self.rect is not None:
+            self.surface.fill(CLEAR, self.rect)
+            self.rect = None
+            self.changed = True
+
+    def mark(self, rect):
+        """Record a rect returned by a ``pygame.draw`` call as drawn on."""
+        self.rect = rect.copy() if self.rect is None else self.rect.union(rect)
+        self.changed = True
+
+
+class Compositor:
+    def __init__(self, size, history=240):
+        self.size = size
+        self.layers = {}  # Composited in creation order
+        self._history = history
+        self._timings = {}
+
+    def layer(self, name):
+        if name not in self.layers:
+            self.layers[name] = OverlayLayer(self.size)
+            self._timings[name] = {"draw": deque(maxlen=self._history), "blit": deque(maxlen=self._history)}
+        return self.layers[name]
+
+    @contextmanager
+    def draw(self, name):
+        """Clear what the layer showed last time, then let the caller draw on it."""
+        start = time.perf_counter()
+        layer = self.layer(name)
+        layer.clear()
+        yield layer
+        self._timings[name]["draw"].append(time.perf_counter() - start)
+
+    @property
+    def changed(self):
+        return any(layer.changed for layer in self.layers.values())
+
+    def composite(self, screen):
+        """Blend the drawn part of every layer onto the screen."""
+        for name, layer in self.layers.items():
+            start = time.perf_counter()
+            if layer.rect is not None:
+                screen.blit(layer.surface, layer.rect.topleft, area=layer.rect)
+            layer.changed = False
+            self._timings[name]["blit"].append(time.perf_counter() - start)
+
+    def timings(self):
+        """Mean draw and blit time per layer, in milliseconds."""
+        return {
+            name: {
+                stage: float(np.mean(samples) * 1000) if samples else 0.0
+                for stage, samples in stages.items()
+            }
+            for name, stages in self._timings.items()
+        }
+
+    def report(self):
+        return "\n".join(
+            f"{name:>10}: draw {stages['draw']:6.2f} ms  blit {stages['blit']:6.2f} ms"
+            for name, stages in self.timings().items()
+        )
@@ -0,0 +1,190 @@
+"""Threaded camera capture + landmark inference with latest-frame-wins queues.
+
+The camera toys used to call ``cap.read()``, ``cv2.flip``, ``cv2.cvtColor`` and
+MediaPipe's ``process()`` one after the other inside the render loop, so every
+frame waited on camera I/O and model inference. ``CapturePipeline`` moves
+capture and inference onto worker threads. Each hand-off is a single-slot
+queue: a new item replaces one that nobody picked up yet, so the renderer only
+ever sees the freshest result and never blocks waiting for one.
+
+Usage::
+
+    pipeline = CapturePipeline(cv2.VideoCapture(0), hands.process).start()
+    while running:
+        packet = pipeline.latest()
+        if packet is not None and packet.seq != last_seq:
+            last_seq = packet.seq
+            ...  # use packet.result / packet.frame
+    pipeline.stop()
+    print(pipeline.report())
+"""
+
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+class LatestSlot:
+    """A one-item queue where ``put`` overwrites whatever hasn't been taken yet."""
+
+    def __init__(self):
+        self._item = None
+        self._full = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._full:
+                self.dropped += 1  # The previous item went stale before anyone took it
+            self._item = item
+            self._full = True
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Block until an item is available (or the slot is closed) and take it."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._full or self._closed, timeout):
+                return None
+            if not self._full:
+                return None
+            item, self._item, self._full = self._item, None, False
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class Packet:
+    """One camera frame and the inference result computed from it."""
+
+    __slots__ = ("seq", "frame", "result", "captured_at", "capture_ms", "inference_ms")
+
+    def __init__(self, seq, frame, captured_at, capture_ms):
+        self.seq = seq
+        self.frame = frame  # Mirrored BGR frame, as the programs used to get from cv2.flip
+        self.result = None
+        self.captured_at = captured_at
+        self.capture_ms = capture_ms
+        self.inference_ms = 0.0
+
+
+class CapturePipeline:
+    """Run ``cap.read()`` and ``process(rgb_frame)`` on background threads."""
+
+    def __init__(self, cap, process, flip=True, history=240, recorder=None):
+        self.cap = cap
+        self.process = process
+        self.flip = flip
+        self.recorder = recorder  # Optional landmark_log.LandmarkRecorder
+        self.finished = False  # Set once the camera stops returning frames
+
+        self._frames = LatestSlot()  # capture -> inference
+        self._latest = None  # inference -> render; read without locking, never blocks
+        self._result_dropped = 0
+        self._last_taken = -1
+        self._running = False
+        self._threads = []
+
+        self._capture_ms = deque(maxlen=history)
+        self._inference_ms = deque(maxlen=history)
+        self._age_ms = deque(maxlen=history)
+
+    def start(self):
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self._frames.close()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self.cap.release()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def _capture_loop(self):
+        seq = 0
+        while self._running:
+            start = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            if self.flip:
+                frame = cv2.flip(frame, 1)  # Mirror effect
+            captured_at = time.perf_counter()
+            self._frames.put(Packet(seq, frame, captured_at, (captured_at - start) * 1000))
+            seq += 1
+        self.finished = True
+        self._frames.close()
+
+    def _inference_loop(self):
+        while self._running:
+            packet = self._frames.get(timeout=0.1)
+            if packet is None:
+                if self.finished:
+                    break
+                continue
+            start = time.perf_counter()
+            packet.result = self.process(cv2.cvtColor(packet.frame, cv2.COLOR_BGR2RGB))
+            packet.inference_ms = (time.perf_counter() - start) * 1000
+            if self.recorder is not None:
+                self.recorder.write(packet.captured_at, packet.result, packet.frame.shape)
+
+            previous = self._latest
+            if previous is not None and previous.seq > self._last_taken:
+                self._result_dropped += 1  # Renderer never saw the previous result
+            self._latest = packet
+
+    def latest(self):
+        """Return the freshest processed packet (possibly one already seen), or None."""
+        packet = self._latest
+        if packet is not None and packet.seq > self._last_taken:
+            self._last_taken = packet.seq
+            self._capture_ms.append(packet.capture_ms)
+            self._inference_ms.append(packet.inference_ms)
+            self._age_ms.append((time.perf_counter() - packet.captured_at) * 1000)
+        return packet
+
+    def stats(self):
+        """Per-stage latency (mean and p95 in ms) and dropped-frame counts."""
+        stats = {
+            "captured_dropped": self._frames.dropped,
+            "results_dropped": self._result_dropped,
+        }
+        for name, samples in (
+            ("capture", self._capture_ms),
+            ("inference", self._inference_ms),
+            ("capture_to_render", self._age_ms),
+        ):
+            values = np.array(samples) if samples else np.zeros(1)
+            stats[name + "_ms"] = {
+                "mean": float(values.mean()),
+                "p95": float(np.percentile(values, 95)),
+            }
+        return stats
+
+    def report(self):
+        stats = self.stats()
+        lines = [
+            f"{name:>22}: mean {value['mean']:6.1f} ms  p95 {value['p95']:6.1f} ms"
+            for name, value in stats.items()
+            if isinstance(value, dict)
+        ]
+        lines.append(
+            f"dropped: {stats['captured_dropped']} camera frames, "
+            f"{stats['results_dropped']} inference results"
+        )
+        return "\n".join(lines)
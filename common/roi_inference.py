@@ -0,0 +1,109 @@
+"""Cheaper hand inference: downscaled detection plus region-of-interest tracking.
+
+Running ``hands.process`` on the full camera frame is the most expensive step
+of every frame. ``RoiHandTracker`` wraps a ``process`` callable and:
+
+* detects on a copy of the frame downscaled by ``scale``;
+* once hands are found, runs on a padded square crop around last frame's
+  landmarks instead (itself shrunk to at most ``roi_size`` pixels);
+* maps the crop's landmarks back to full-frame normalized coordinates;
+* falls back to a full-frame detection as soon as the crop loses the hands.
+
+The result has the same ``multi_hand_landmarks`` field as MediaPipe's, so it
+is a drop-in for ``hands.process`` in ``CapturePipeline``. The hand-tracking
+apps build theirs with ``make_hand_tracker``, from their own settings.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from common.landmark_filter import landmark_array
+from common.landmark_log import HANDS, ReplayLandmarks, ReplayResult
+
+HANDS_SETTINGS = dict(min_detection_confidence=0.7, min_tracking_confidence=0.7)  # For mp.solutions.hands.Hands
+
+
+def make_hand_tracker(settings=None, **hands_kwargs):
+    """MediaPipe hand tracker: ``RoiHandTracker(**settings)``, or plain full-frame ``process`` if ``settings`` is None.
+
+    ``hands_kwargs`` override ``HANDS_SETTINGS``. MediaPipe is imported here
+    rather than at the top, so replays run without it installed.
+    """
+    import mediapipe as mp
+    hands = mp.solutions.hands.Hands(**{**HANDS_SETTINGS, **hands_kwargs})
+    if settings is None:
+        return hands.process
+    return RoiHandTracker(hands.process, **settings)
+
+
+class RoiHandTracker:
+    def __init__(self, process, scale=0.5, padding=0.3, roi_size=256):
+        self.process = process
+        self.scale = scale
+        self.padding = padding  # Extra margin around the hands, as a fraction of their box size
+        self.roi_size = roi_size
+        self.roi = None  # (left, top, side) in full-frame pixels, or None to detect on the whole frame
+        self.frames = 0
+        self.roi_frames = 0  # Frames answered from the crop
+        self.detections = 0  # Full-frame detections (first frame and every time tracking was lost)
+        self.cpu_ms = 0.0
+
+    def __call__(self, rgb_frame):
+        start = time.process_time()
+        self.frames += 1
+        hands = self._run_roi(rgb_frame) if self.roi is not None else None
+        if hands:
+            self.roi_frames += 1
+        else:
+            hands = self._run_full(rgb_frame)  # Tracking lost (or never started): re-detect
+            self.detections += 1
+
+        self.roi = self._next_roi(hands, rgb_frame.shape) if hands else None
+        self.cpu_ms += (time.process_time() - start) * 1000
+        return ReplayResult(HANDS, hands)
+
+    def _run_full(self, rgb_frame):
+        image = rgb_frame
+        if self.scale != 1.0:
+            image = cv2.resize(rgb_frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        result = self.process(image)
+        # Normalized coordinates don't depend on the image size, so nothing to map back
+        return [ReplayLandmarks(landmark_array(hand).astype(np.float32)) for hand in result.multi_hand_landmarks or []]
+
+    def _run_roi(self, rgb_frame):
+        left, top, side = self.roi
+        crop = rgb_frame[top : top + side, left : left + side]
+        if side > self.roi_size:
+            crop = cv2.resize(crop, (self.roi_size, self.roi_size), interpolation=cv2.INTER_AREA)
+        result = self.process(np.ascontiguousarray(crop))
+
+        height, width = rgb_frame.shape[:2]
+        hands = []
+        for hand in result.multi_hand_landmarks or []:
+            points = landmark_array(hand).astype(np.float32)
+            points[:, 0] = (points[:, 0] * side + left) / width
+            points[:, 1] = (points[:, 1] * side + top) / height
+            points[:, 2] *= side / width  # MediaPipe's z is relative to the image width
+            hands.append(ReplayLandmarks(points))
+        return hands
+
+    def _next_roi(self, hands, frame_shape):
+        """Padded square around all hands, clamped to the frame."""
+        height, width = frame_shape[:2]
+        points = np.concatenate([hand.points[:, :2] for hand in hands]) * (width, height)
+        (x_min, y_min), (x_max, y_max) = points.min(axis=0), points.max(axis=0)
+        side = max(x_max - x_min, y_max - y_min) * (1 + 2 * self.padding)
+        side = int(min(max(side, 32), width, height))
+        left = int(np.clip((x_min + x_max - side) / 2, 0, width - side))
+        top = int(np.clip((y_min + y_max - side) / 2, 0, height - side))
+        return left, top, side
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "roi_frames": self.roi_frames,
+            "detections": self.detections,
+            "cpu_ms_per_frame": self.cpu_ms / max(1, self.frames),
+        }
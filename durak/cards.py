@@ -0,0 +1,84 @@
+"""Compact card encoding for Durak: cards are ints 0-35, hands are 36-bit masks.
+
+Card ids are rank-major (``rank * 4 + suit``), so the lowest set bit of any
+mask is its weakest card, ties between suits going to the earlier suit.
+Whether one card beats another is a single AND against
+``BEATS[trump][card]``, precomputed for every trump suit. Strings like
+"7 of Spades" only appear at the display/input boundary, through
+``card_name`` and ``parse_card``.
+"""
+
+SUITS = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
+RANKS = ['6', '7', '8', '9', '10', 'Jack', 'Queen', 'King', 'Ace']
+CARDS = len(SUITS) * len(RANKS)
+FULL_DECK = (1 << CARDS) - 1
+
+
+def card(rank, suit):
+    return rank * len(SUITS) + suit
+
+
+def rank_of(card):
+    return card // len(SUITS)
+
+
+def suit_of(card):
+    return card % len(SUITS)
+
+
+def bit(card):
+    return 1 << card
+
+
+SUIT_MASKS = [sum(bit(card(rank, suit)) for rank in range(len(RANKS))) for suit in range(len(SUITS))]
+RANK_MASKS = [sum(bit(card(rank, suit)) for suit in range(len(SUITS))) for rank in range(len(RANKS))]
+
+
+def _beats(attack, trump):
+    """Mask of every card that beats ``attack``: higher of its suit, or any trump if it isn't one."""
+    suit = suit_of(attack)
+    higher = SUIT_MASKS[suit] & ~((bit(attack) << 1) - 1)
+    return higher | (SUIT_MASKS[trump] if suit != trump else 0)
+
+
+BEATS = [[_beats(attack, trump) for attack in range(CARDS)] for trump in range(len(SUITS))]
+
+NAMES = [f"{RANKS[rank_of(card)]} of {SUITS[suit_of(card)]}" for card in range(CARDS)]
+_IDS = {name.lower(): card for card, name in enumerate(NAMES)}
+
+
+def card_name(card):
+    return NAMES[card]
+
+
+def parse_card(text):
+    """Card id for a name like "7 of Spades" (any case), or None if it isn't one."""
+    return _IDS.get(" ".join(text.split()).lower())
+
+
+def mask_of(cards):
+    mask = 0
+    for card in cards:
+        mask |= bit(card)
+    return mask
+
+
+def cards_of(mask):
+    """Card ids in a mask, weakest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def lowest(mask):
+    """Weakest card in a mask, or None if it is empty."""
+    return (mask & -mask).bit_length() - 1 if mask else None
+
+
+def count(mask):
+    return bin(mask).count("1")
+
+
+def hand_names(mask):
+    return [NAMES[card] for card in cards_of(mask)]
@@ -1,51 +1,71 @@
+import argparse
+import contextlib
+import io
+import json
 import random
 
-# Suits and Ranks
-suits = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
-ranks = ['6', '7', '8', '9', '10', 'Jack', 'Queen', 'King', 'Ace']
+from cards import (
+    BEATS, CARDS, SUIT_MASKS, SUITS, bit, card_name, count, hand_names, lowest, mask_of, parse_card, rank_of, suit_of,
+)
 
-# Create a deck of cards
+# Create a deck of cards (ids 0-35, see cards.py)
 def create_deck():
-    return [f"{rank} of {suit}" for suit in suits for rank in ranks]
+    return list(range(CARDS))
 
 class AIOpponent:
     def __init__(self, hand, trump_suit):
-        self.hand = hand
-        self.trump_suit = trump_suit
+        self.hand = hand  # Card mask
+        self.trump_suit = trump_suit  # Suit index
+        self.opponent_hand = None  # Set once the deck is empty, which switches to the endgame solver
+        self.solver = None
 
     def choose_attack_card(self, center_cards):
         """Choose the weakest card to attack with."""
-        non_trump_cards = [card for card in self.hand if not card.endswith(f"of {self.trump_suit}")]
-        trump_cards = [card for card in self.hand if card.endswith(f"of {self.trump_suit}")]
+        if self.opponent_hand is not None and self.hand:
+            return self._endgame_choice(())
 
-        if non_trump_cards:
-            # Return the weakest non-trump card
-            return sorted(non_trump_cards, key=lambda c: ranks.index(c.split(' of ')[0]))[0]
-        elif trump_cards:
-            # Return the weakest trump card if no non-trump cards are available
-            return sorted(trump_cards, key=lambda c: ranks.index(c.split(' of ')[0]))[0]
-        return None
+        non_trump_cards = self.hand & ~SUIT_MASKS[self.trump_suit]
+
+        # The weakest non-trump card, or the weakest trump card if there are no others
+        return lowest(non_trump_cards or self.hand)
 
     def choose_defense_card(self, attack_card):
         """Choose the weakest valid card to defend with."""
-        attack_rank, attack_suit = attack_card.split(' of ')
+        if self.opponent_hand is not None:
+            return self._endgame_choice((attack_card,))
 
-        # Find valid defense cards
-        same_suit_cards = [
-            card for card in self.hand if card.endswith(f"of {attack_suit}") and
-            ranks.index(card.split(' of ')[0]) > ranks.index(attack_rank)
-        ]
-        trump_cards = [
-            card for card in self.hand if card.endswith(f"of {self.trump_suit}") and attack_suit != self.trump_suit
-        ]
+        valid_cards = self.hand & BEATS[self.trump_suit][attack_card]
+        same_suit_cards = valid_cards & SUIT_MASKS[suit_of(attack_card)]
+
+        # Use the weakest card of the same suit, else the weakest trump card (None if neither)
+        return lowest(same_suit_cards or valid_cards)
+
+    def _endgame_choice(self, attacks):
+        """Solver's play against the known opponent hand: a card to lead or to beat ``attacks`` with, None to take.
+
+        The solve is exact under engine.py's rules but only approximate for
+        ``DurakGame``, whose rules differ: here a beaten card stays on the
+        table, the attacker may follow up with any card rather than one of a
+        rank on the table, nobody ends a bout, and a pickup takes the whole
+        table. The solver sees only the attack being answered, on an
+        otherwise empty table. Its move is always legal here all the same
+        (``check_endgame_moves``). Falls back to the greedy choice if the
+        solver gives up on a position.
+        """
+        from endgame import MOVE_MAX_NODES, EndgameSolver  # Only endgames need the search stack, not the plain CLI game
+        from engine import TAKE
 
-        if same_suit_cards:
-            # Use the weakest card of the same suit
-            return sorted(same_suit_cards, key=lambda c: ranks.index(c.split(' of ')[0]))[0]
-        elif trump_cards:
-            # Use the weakest trump card if defending with the same suit isn't possible
-            return sorted(trump_cards, key=lambda c: ranks.index(c.split(' of ')[0]))[0]
-        return None  # No valid defense card found
+        if self.solver is None:
+            # Kept, so later moves reuse its transposition table
+            self.solver = EndgameSolver(self.trump_suit, max_nodes=MOVE_MAX_NODES)
+        attacker = 1 if attacks else 0  # The AI is player 0
+        best = self.solver.solve([self.hand, self.opponent_hand], attacker, attacks)
+        if best is None:
+            opponent_hand, self.opponent_hand = self.opponent_hand, None
+            choice = self.choose_defense_card(attacks[0]) if attacks else self.choose_attack_card([])
+            self.opponent_hand = opponent_hand
+            return choice
+        return None if best[0] == TAKE else best[0]
 
 
 class DurakGame:
@@ -53,12 +73,12 @@ class DurakGame:
         self.num_players = num_players
         self.deck = create_deck()
         random.shuffle(self.deck)
-        self.players = [[] for _ in range(num_players)]
+        self.players = [0 for _ in range(num_players)]  # Hands as card masks
         self.trump_card = self.deck.pop()
-        self.trump_suit = self.trump_card.split(' of ')[1]
+        self.trump_suit = suit_of(self.trump_card)
         self.current_attacker = 0
         self.current_defender = 1
-        self.center_cards = []  # Cards currently in play
+        self.center_cards = []  # Card ids currently in play
 
         # Initialize AI Opponents
         self.ai_opponents = [
@@ -86,9 +106,9 @@ class DurakGame:
 
     def deal_cards(self):
         """Deal six cards to each player."""
-        for player in self.players:
-            while len(player) < 6 and self.deck:
-                player.append(self.deck.pop())
+        for i in range(self.num_players):
+            while count(self.players[i]) < 6 and self.deck:
+                self.players[i] |= bit(self.deck.pop())
         # Sync AI hands
         for ai in self.ai_opponents:
             ai.hand = self.players[self.ai_opponents.index(ai) + 1]
@@ -96,9 +116,9 @@ class DurakGame:
     def display_game_state(self):
         """Display the current game state."""
         print("\n" + "=" * 40)
-        print(f"Trump Card: {self.trump_card} (Trump Suit: {self.trump_suit})")
-        print("Cards in Play: ", ", ".join(self.center_cards) if self.center_cards else "None")
-        print(f"Your Hand: {', '.join(self.players[0])}")
+        print(f"Trump Card: {card_name(self.trump_card)} (Trump Suit: {SUITS[self.trump_suit]})")
+        print("Cards in Play: ", ", ".join(map(card_name, self.center_cards)) if self.center_cards else "None")
+        print(f"Your Hand: {', '.join(hand_names(self.players[0]))}")
         print("=" * 40)
 
 
@@ -107,14 +127,9 @@ class DurakGame:
         if len(self.center_cards) % 2 == 0:  # Attack move
             return True
         else:  # Defense move
+            # Valid defense with a higher card of the same suit, or a trump card against a non-trump
             attack_card = self.center_cards[-1]
-            attack_rank, attack_suit = attack_card.split(' of ')
-            rank, suit = card.split(' of ')
-            if suit == attack_suit and ranks.index(rank) > ranks.index(attack_rank):
-                return True  # Valid defense with the same suit
-            elif suit == self.trump_suit and attack_suit != self.trump_suit:
-                return True  # Valid defense with a trump card
-            return False
+            return bool(BEATS[self.trump_suit][attack_card] & bit(card))
 
     
 
@@ -139,28 +154,29 @@ class DurakGame:
                 self.display_game_state()
 
                 if len(self.center_cards) % 2 == 0:  # Player is attacking
-                    move = input("Choose a card to attack with (e.g., '7 of Spades'): ").strip()
-                    if move in self.players[0]:
+                    move = parse_card(input("Choose a card to attack with (e.g., '7 of Spades'): "))
+                    if move is not None and self.players[0] & bit(move):
                         # Validate and play the chosen card
                         self.center_cards.append(move)
-                        self.players[0].remove(move)
-                        print(f"You attacked with {move}.")
+                        self.players[0] &= ~bit(move)
+                        print(f"You attacked with {card_name(move)}.")
                         return "player_attacked"
                     else:
                         print("Invalid input. Please choose a valid card.")
                 else:  # Player is defending
-                    move = input("Choose a card to defend with (e.g., '7 of Spades') or type 'pickup': ").strip()
-                    if move == "pickup":
+                    text = input("Choose a card to defend with (e.g., '7 of Spades') or type 'pickup': ").strip()
+                    move = parse_card(text)
+                    if text == "pickup":
                         # Player chooses to pick up cards
                         print("You picked up the cards!")
-                        self.players[0].extend(self.center_cards)
+                        self.players[0] |= mask_of(self.center_cards)
                         self.center_cards = []
                         return "pickup"
-                    elif move in self.players[0] and self.validate_move(move):
+                    elif move is not None and self.players[0] & bit(move) and self.validate_move(move):
                         # Validate and play the chosen card
                         self.center_cards.append(move)
-                        self.players[0].remove(move)
-                        print(f"You defended with {move}.")
+                        self.players[0] &= ~bit(move)
+                        print(f"You defended with {card_name(move)}.")
                         return "player_defended"
                     else:
                         print("Invalid move. Try again.")
@@ -170,25 +186,29 @@ class DurakGame:
     def computer_move(self):
         """Handle the AI's move."""
         ai = self.ai_opponents[self.current_attacker - 1]
+        # With the deck gone, the human's hand is everything not yet seen: the AI switches to the endgame solver
+        ai.opponent_hand = self.players[0] if not self.deck and self.num_players == 2 else None
 
         if len(self.center_cards) % 2 == 0:  # AI is attacking
+            ai.hand = self.players[self.current_attacker]
             attack_card = ai.choose_attack_card(self.center_cards)
-            if attack_card:
+            if attack_card is not None:
                 self.center_cards.append(attack_card)
-                self.players[self.current_attacker].remove(attack_card)
-                print(f"Computer attacked with {attack_card}.")
+                self.players[self.current_attacker] &= ~bit(attack_card)
+                print(f"Computer attacked with {card_name(attack_card)}.")
                 return "computer_attacked"
         else:  # AI is defending
+            ai.hand = self.players[self.current_defender]
             attack_card = self.center_cards[-1]
             defense_card = ai.choose_defense_card(attack_card)
-            if defense_card:
+            if defense_card is not None:
                 self.center_cards.append(defense_card)
-                self.players[self.current_defender].remove(defense_card)
-                print(f"Computer defended with {defense_card}.")
+                self.players[self.current_defender] &= ~bit(defense_card)
+                print(f"Computer defended with {card_name(defense_card)}.")
                 return "computer_defended"
             else:
                 print("Computer couldn't defend and picked up the cards.")
-                self.players[self.current_defender].extend(self.center_cards)
+                self.players[self.current_defender] |= mask_of(self.center_cards)
                 self.center_cards = []
                 return "pickup"
 
@@ -225,7 +245,68 @@ class DurakGame:
             self.deal_cards()
 
 
+def check_endgame_moves(positions=500, seed=0):
+    """Set up two-player ``DurakGame`` endgames and check that every AI move is one the game allows.
+
+    Each position has an empty deck, random hands and a random table of
+    beaten pairs; the AI either attacks or answers a fresh attack. Attacks
+    must come from the AI's hand, defenses must beat the attack card, and
+    a pickup must take the whole table.
+    """
+    rng = random.Random(seed)
+    problems = []
+    for position in range(positions):
+        game = DurakGame(num_players=2)
+        cards = list(range(CARDS))
+        rng.shuffle(cards)
+        game.deck = []
+        game.players = [mask_of(cards[:rng.randint(1, 6)]), mask_of(cards[6:6 + rng.randint(1, 6)])]
+        rest = cards[12:]
+        for _ in range(rng.randint(0, 3)):  # Beaten pairs left on the table
+            attack = rest.pop()
+            defense = next((card for card in rest if BEATS[game.trump_suit][attack] & bit(card)), None)
+            if defense is not None:
+                rest.remove(defense)
+                game.center_cards += [attack, defense]
+        defending = rng.random() < 0.5
+        game.current_attacker, game.current_defender = (0, 1) if defending else (1, 0)
+        if defending:
+            game.center_cards.append(rest.pop())
+
+        hand, table = game.players[1], list(game.center_cards)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = game.computer_move()
+        played = game.center_cards[-1] if len(game.center_cards) > len(table) else None
+        if result == "pickup":
+            legal = defending and game.players[1] == hand | mask_of(table) and not game.center_cards
+        elif defending:
+            attack = table[-1]
+            beats = suit_of(played) == suit_of(attack) and rank_of(played) > rank_of(attack)
+            legal = result == "computer_defended" and hand & bit(played) and (
+                beats or suit_of(played) == game.trump_suit != suit_of(attack)
+            )
+        else:
+            legal = result == "computer_attacked" and played is not None and hand & bit(played)
+        if not legal or played is not None and game.players[1] != hand & ~bit(played):
+            problems.append({
+                "position": position, "defending": defending, "result": result,
+                "hand": hand_names(hand), "table": [card_name(card) for card in table],
+            })
+    return {"positions": positions, "problems": problems}
+
+
 # Start the game
 if __name__ == "__main__":
-    game = DurakGame(num_players=2)
-    game.play_game()
+    parser = argparse.ArgumentParser(description="Durak against the computer")
+    parser.add_argument("--check", action="store_true", help="check the AI's endgame moves instead of playing")
+    parser.add_argument("--positions", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.check:
+        result = check_endgame_moves(args.positions)
+        print(json.dumps(result), flush=True)
+        if result["problems"]:
+            raise SystemExit(1)
+    else:
+        game = DurakGame(num_players=2)
+        game.play_game()
@@ -0,0 +1,310 @@
+"""Exact two-player Durak endgame solver for once the deck is empty.
+
+With no cards left to draw, each player can work out the other's hand
+(everything not in their own hand, on the table or discarded), so the rest
+of the game is a perfect-information game with three outcomes. The solver
+runs minimax with alpha-beta pruning over engine.py's rules and caches
+results in a transposition table keyed on the position packed into one
+integer: both hands, the table, the undefended attack card, how many
+attacks were made and may be made, and who is attacking. The table is an
+LRU capped at ``capacity`` entries, and it is kept between calls so later
+moves of the same endgame are mostly lookups. Most six-against-six
+endgames take well under a second, but a few need millions of nodes, so a
+solve can be capped at ``max_nodes`` and gives up (returns None) past it.
+``--check`` compares the solver with plain minimax over ``DurakState`` on
+endgames small enough to search that way::
+
+    python endgame.py --positions 50
+    python endgame.py --check --positions 500
+"""
+
+import argparse
+import json
+import random
+import time
+from collections import OrderedDict
+
+from cards import BEATS, RANK_MASKS, RANKS, bit, card, cards_of, count
+from engine import DONE, MAX_ATTACKS, TAKE, DurakState
+
+WIN, DRAW, LOSS = 1, 0, -1
+# Node budget for a move in play, about 200 ms: enough to solve four in five first moves of 6-vs-6 endgames
+MOVE_MAX_NODES = 40_000
+EXACT, LOWER, UPPER = 0, 1, 2
+FIRST_OF_RANK = sum(bit(card(rank, 0)) for rank in range(len(RANKS)))
+
+
+def table_ranks(table):
+    """Mask of every card sharing a rank with a card in ``table``; each rank is one 4-bit nibble."""
+    table |= table >> 1
+    table |= table >> 2
+    return (table & FIRST_OF_RANK) * RANK_MASKS[0]
+
+
+class _OutOfNodes(Exception):
+    pass
+
+
+class EndgameSolver:
+    def __init__(self, trump, capacity=1_000_000, max_nodes=None):
+        self.trump = trump
+        self.beats = BEATS[trump]
+        self.capacity = capacity
+        self.max_nodes = max_nodes  # Per solve; None searches to the end however long it takes
+        self._budget = None
+        self.table = OrderedDict()  # Packed position -> (value, bound)
+        self.nodes = 0
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self.solve_time = 0.0
+
+    def solve(self, hands, attacker, attacks=(), defenses=(), limit=None):
+        """``(action, value)`` for the player to move, value being WIN, DRAW or LOSS for them.
+
+        ``hands`` are both players' card masks and ``attacks``/``defenses``
+        the cards on the table this bout; ``limit`` defaults to what the
+        engine would have set (the defender's hand at the start of the bout).
+        Of equally good actions the weakest card is chosen, and ``TAKE`` or
+        ``DONE`` only if it is strictly better. Returns None if the search
+        runs past ``max_nodes``.
+        """
+        start = time.perf_counter()
+        defender = 1 - attacker
+        table = 0
+        for card in list(attacks) + list(defenses):
+            table |= bit(card)
+        pending = attacks[-1] if len(attacks) > len(defenses) else -1
+        if limit is None:
+            limit = min(MAX_ATTACKS, count(hands[defender]) + len(defenses))
+        mover = defender if pending >= 0 else attacker
+        sign = 1 if mover == 0 else -1  # _value is from player 0's point of view
+
+        self._budget = None if self.max_nodes is None else self.nodes + self.max_nodes
+        best = None
+        try:
+            for action, child in self._children(hands[0], hands[1], attacker, table, pending, len(attacks), limit):
+                alpha = LOSS if best is None else best[1]  # Later actions only need to show they're better
+                if alpha == WIN:
+                    break
+                if isinstance(child, int):
+                    value = sign * child
+                elif sign > 0:
+                    value = self._value(child, alpha, WIN)
+                else:
+                    value = -self._value(child, LOSS, -alpha)
+                if best is None or value > best[1]:
+                    best = (action, value)
+        except _OutOfNodes:
+            best = None
+        self.solve_time += time.perf_counter() - start
+        return best
+
+    def best_action(self, state):
+        """Best action in a two-player ``DurakState`` with an empty deck, or None past ``max_nodes``."""
+        best = self.solve(state.hands, state.attacker, state.attacks, state.defenses, state.limit)
+        return None if best is None else best[0]
+
+    def stats(self):
+        return {
+            "nodes": self.nodes,
+            "nodes_per_sec": self.nodes / self.solve_time if self.solve_time else 0.0,
+            "lookups": self.lookups,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "entries": len(self.table),
+            "evictions": self.evictions,
+            "solve_time": self.solve_time,
+        }
+
+    def _children(self, h0, h1, attacker, table, pending, attacks, limit):
+        """``(action, position)`` pairs, weakest card first and passing last; a finished game is its value instead."""
+        hands = [h0, h1]
+        defender = 1 - attacker
+        if pending >= 0:
+            for card in cards_of(hands[defender] & self.beats[pending]):
+                child = hands[:]
+                child[defender] &= ~bit(card)
+                yield card, (child[0], child[1], attacker, table | bit(card), -1, attacks, limit)
+            # Take: the attacker attacks again, unless that was their last card
+            child = hands[:]
+            child[defender] |= table
+            if not child[attacker]:
+                yield TAKE, WIN if attacker == 0 else LOSS
+            else:
+                yield TAKE, (child[0], child[1], attacker, 0, -1, 0, min(MAX_ATTACKS, count(child[defender])))
+            return
+
+        if not attacks:
+            playable = hands[attacker]
+        elif attacks < limit:
+            playable = hands[attacker] & table_ranks(table)  # Throw-ins
+        else:
+            playable = 0
+        for card in cards_of(playable):
+            child = hands[:]
+            child[attacker] &= ~bit(card)
+            yield card, (child[0], child[1], attacker, table | bit(card), card, attacks + 1, limit)
+        if attacks:
+            # Beaten: the table is discarded and the defender attacks, unless someone is out
+            if not hands[attacker] or not hands[defender]:
+                if not hands[attacker] and not hands[defender]:
+                    yield DONE, DRAW
+                else:
+                    yield DONE, WIN if not hands[0] else LOSS
+            else:
+                yield DONE, (h0, h1, defender, 0, -1, 0, min(MAX_ATTACKS, count(hands[attacker])))
+
+    def _value(self, position, alpha, beta):
+        """Minimax value of a position for player 0, searched within ``alpha``/``beta``."""
+        h0, h1, attacker, table, pending, attacks, limit = position
+        self.nodes += 1
+        if self._budget is not None and self.nodes > self._budget:
+            raise _OutOfNodes
+
+        key = h0 | h1 << 36 | table << 72 | (pending + 1) << 108 | attacks << 114 | limit << 118 | attacker << 122
+        original_alpha, original_beta = alpha, beta
+        self.lookups += 1
+        entry = self.table.get(key)
+        if entry is not None:
+            self.table.move_to_end(key)
+            value, bound = entry
+            if bound == EXACT or (bound == LOWER and value >= beta) or (bound == UPPER and value <= alpha):
+                self.hits += 1
+                return value
+            if bound == LOWER:
+                alpha = max(alpha, value)
+            elif bound == UPPER:
+                beta = min(beta, value)
+
+        mover = 1 - attacker if pending >= 0 else attacker
+        maximizing = mover == 0
+        best = LOSS if maximizing else WIN
+        for _, child in self._children(h0, h1, attacker, table, pending, attacks, limit):
+            value = child if isinstance(child, int) else self._value(child, alpha, beta)
+            if maximizing:
+                best = max(best, value)
+                alpha = max(alpha, best)
+            else:
+                best = min(best, value)
+                beta = min(beta, best)
+            if alpha >= beta:
+                break
+
+        if best <= original_alpha:
+            bound = UPPER
+        elif best >= original_beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table[key] = (best, bound)
+        if len(self.table) > self.capacity:
+            self.table.popitem(last=False)
+            self.evictions += 1
+        return best
+
+
+def endgame_positions(count, seed=0):
+    """Two-player positions from ``AIOpponent`` self-play at the moment the deck runs out."""
+    from selfplay import ai_policy
+
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = DurakState.deal(2, rng)
+        while not state.over and state.deck:
+            state.apply(ai_policy(state, rng))
+        if not state.over:
+            positions.append(state)
+    return positions
+
+
+def minimax(state, player, memo):
+    """WIN, DRAW or LOSS for ``player`` by searching every move of ``state`` with the engine, no pruning."""
+    key = (tuple(state.hands), tuple(state.attacks), tuple(state.defenses), state.attacker, state.limit)
+    if key not in memo:
+        if state.over:
+            memo[key] = DRAW if state.durak is None else WIN if state.durak != player else LOSS
+        else:
+            values = []
+            for action in state.legal_actions():
+                child = state.copy()
+                child.apply(action)
+                values.append(minimax(child, player, memo))
+            memo[key] = max(values) if state.to_move == player else min(values)
+    return memo[key]
+
+
+def check(positions=200, cards=6, seed=0):
+    """Solve self-play endgames, played on at random to ``cards`` cards in play or fewer, and compare with ``minimax``.
+
+    Each position is solved with a roomy table and with one small enough to
+    keep evicting; both must find the minimax value, with the weakest best
+    action (passing last, as ``legal_actions`` orders them).
+    """
+    rng = random.Random(seed)
+    checked, problems = 0, []
+    for state in endgame_positions(positions, seed):
+        while not state.over and count(state.hands[0] | state.hands[1] | state.table) > cards:
+            state.apply(rng.choice(state.legal_actions()))
+        if state.over:
+            continue
+        player, memo = state.to_move, {}
+        values = {}
+        for action in state.legal_actions():
+            child = state.copy()
+            child.apply(action)
+            values[action] = minimax(child, player, memo)
+        best = max(values.values())
+        expected = next(action for action, value in values.items() if value == best)
+        for capacity in (1_000_000, 50):
+            solved = EndgameSolver(state.trump, capacity).solve(
+                state.hands, state.attacker, state.attacks, state.defenses, state.limit,
+            )
+            if solved != (expected, best):
+                problems.append({"position": checked, "capacity": capacity, "solver": solved, "minimax": values})
+        checked += 1
+    return {"positions": checked, "cards": cards, "problems": problems}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve Durak endgames from self-play positions")
+    parser.add_argument("--positions", type=int, default=20)
+    parser.add_argument("--capacity", type=int, default=1_000_000, help="transposition table entries")
+    parser.add_argument("--max-nodes", type=int, default=2_000_000, help="give up on a position after this many")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true", help="compare with plain minimax instead of timing")
+    parser.add_argument("--cards", type=int, default=6, help="most cards in play (hands and table) for --check")
+    args = parser.parse_args()
+
+    if args.check:
+        result = check(args.positions, args.cards, args.seed)
+        print(json.dumps(result), flush=True)
+        if result["problems"]:
+            raise SystemExit(1)
+        return
+
+    times = []
+    for state in endgame_positions(args.positions, args.seed):
+        solver = EndgameSolver(state.trump, args.capacity, args.max_nodes)
+        start = time.perf_counter()
+        solved = solver.best_action(state) is not None
+        if solved:
+            times.append(time.perf_counter() - start)
+        print(json.dumps({"hands": [count(hand) for hand in state.hands], "solved": solved, **solver.stats()}),
+              flush=True)
+
+    times.sort()
+    print(json.dumps({
+        "final": True,
+        "positions": args.positions,
+        "solved": len(times),
+        "solve_ms": {
+            "mean": sum(times) / len(times) * 1000,
+            "p50": times[len(times) // 2] * 1000,
+            "max": times[-1] * 1000,
+        } if times else None,
+    }), flush=True)
+
+
+if __name__ == "__main__":
+    main()
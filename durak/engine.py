@@ -0,0 +1,264 @@
+"""Headless Durak rules engine on card masks, for self-play and search.
+
+The rules, for two to six players:
+
+* 36-card deck; the bottom card is turned up as trump and is drawn last.
+  Everyone is dealt six, and whoever holds the lowest trump leads first
+  (player 0 if nobody has one).
+* A bout: the attacker leads any card, and the defender must beat it (a
+  higher card of the same suit, or any trump against a non-trump) or take
+  every card on the table. Once everything is beaten the attacker may throw
+  in another card of a rank already on the table, up to six attacks and no
+  more than the defender held when the bout started, or end the bout. Only
+  the attacker attacks; other players don't throw in.
+* A beaten bout is discarded and the defender attacks next; if the defender
+  takes, the player after them attacks. Hands are then refilled to six from
+  the deck, attacker first and defender last.
+* Once the deck is empty, players without cards are out. The last player
+  left holding cards is the durak; if the last players go out together it
+  is a draw.
+
+Actions are card ids (see cards.py) or ``TAKE`` / ``DONE``. Running the
+module plays random games and checks the rules' invariants after every
+move (cards conserved, moves legal, hands refilled, the game ending)::
+
+    python engine.py --games 2000
+"""
+
+import argparse
+import json
+import random
+
+from cards import BEATS, CARDS, FULL_DECK, RANK_MASKS, SUIT_MASKS, bit, cards_of, count, lowest, rank_of, suit_of
+
+TAKE = -1  # Defender picks up the table
+DONE = -2  # Attacker ends the bout
+HAND_SIZE = 6
+MAX_ATTACKS = 6
+
+
+class DurakState:
+    __slots__ = (
+        "hands", "deck", "trump_card", "trump", "attacker", "defender", "attacks", "defenses",
+        "table", "table_ranks", "limit", "discard", "known", "out", "bouts", "moves",
+    )
+
+    def __init__(self, hands, deck, trump_card, attacker):
+        self.hands = hands  # Card mask per player
+        self.deck = deck  # Card ids, drawn from the end; deck[0] is the face-up trump card
+        self.trump_card = trump_card
+        self.trump = suit_of(trump_card)
+        self.discard = 0  # Mask of beaten cards
+        self.known = [0] * len(hands)  # Cards everyone has seen go into each hand (taken, or the trump card)
+        self.out = []  # Players in the order they ran out of cards
+        self.bouts = 0
+        self.moves = 0
+        self._start_bout(attacker)
+
+    @classmethod
+    def deal(cls, num_players=2, rng=random):
+        deck = list(range(CARDS))
+        rng.shuffle(deck)
+        trump_card = deck[0]  # Still sets trumps if a six-player deal uses up the deck
+        hands = [0] * num_players
+        for _ in range(HAND_SIZE):
+            for player in range(num_players):
+                hands[player] |= bit(deck.pop())
+
+        # Lowest trump leads
+        trump_mask = SUIT_MASKS[suit_of(trump_card)]
+        lowest_trumps = [(lowest(hand & trump_mask), player) for player, hand in enumerate(hands) if hand & trump_mask]
+        attacker = min(lowest_trumps)[1] if lowest_trumps else 0
+        return cls(hands, deck, trump_card, attacker)
+
+    def copy(self):
+        state = DurakState.__new__(DurakState)
+        for name in DurakState.__slots__:
+            setattr(state, name, getattr(self, name))
+        state.hands, state.deck, state.known = self.hands[:], self.deck[:], self.known[:]
+        state.attacks, state.defenses, state.out = self.attacks[:], self.defenses[:], self.out[:]
+        return state
+
+    @property
+    def num_players(self):
+        return len(self.hands)
+
+    @property
+    def over(self):
+        return self.attacker is None
+
+    @property
+    def durak(self):
+        """The loser once the game is over, or None for a draw (or while it's still going)."""
+        if not self.over:
+            return None
+        left = [player for player in range(self.num_players) if player not in self.out]
+        return left[0] if left else None
+
+    @property
+    def to_move(self):
+        return self.defender if len(self.attacks) > len(self.defenses) else self.attacker
+
+    def playable(self):
+        """Mask of the cards the player to move may play (``TAKE``/``DONE`` aside)."""
+        if len(self.attacks) > len(self.defenses):
+            return self.hands[self.defender] & BEATS[self.trump][self.attacks[-1]]
+        if not self.attacks:
+            return self.hands[self.attacker]
+        if len(self.attacks) >= self.limit:
+            return 0
+        return self.hands[self.attacker] & self.table_ranks
+
+    def pass_action(self):
+        """``TAKE`` or ``DONE`` when the player to move may pass, else None (an attacker must lead)."""
+        if len(self.attacks) > len(self.defenses):
+            return TAKE
+        return DONE if self.attacks else None
+
+    def legal_actions(self):
+        actions = list(cards_of(self.playable()))
+        passing = self.pass_action()
+        if passing is not None:
+            actions.append(passing)
+        return actions
+
+    def apply(self, action):
+        self.moves += 1
+        if action == TAKE:
+            self.hands[self.defender] |= self.table
+            self.known[self.defender] |= self.table
+            self._end_bout(self._next_player(self.defender))
+        elif action == DONE:
+            self.discard |= self.table
+            self._end_bout(self.defender)
+        else:
+            player = self.to_move
+            self.hands[player] &= ~bit(action)
+            self.known[player] &= ~bit(action)
+            (self.defenses if player == self.defender else self.attacks).append(action)
+            self.table |= bit(action)
+            self.table_ranks |= RANK_MASKS[rank_of(action)]
+
+    def _start_bout(self, attacker):
+        self.attacker = attacker
+        self.defender = self._next_player(attacker)
+        self.attacks = []
+        self.defenses = []
+        self.table = 0
+        self.table_ranks = 0
+        self.limit = min(MAX_ATTACKS, count(self.hands[self.defender]))
+
+    def _end_bout(self, next_attacker):
+        self.bouts += 1
+        # Refill attacker first, defender last
+        order = [(self.attacker + offset) % self.num_players for offset in range(self.num_players)]
+        order.remove(self.defender)
+        for player in order + [self.defender]:
+            while self.deck and count(self.hands[player]) < HAND_SIZE:
+                card = self.deck.pop()
+                self.hands[player] |= bit(card)
+                if not self.deck:
+                    self.known[player] |= bit(card)  # The face-up trump card
+
+        if not self.deck:
+            for player in order + [self.defender]:
+                if not self.hands[player] and player not in self.out:
+                    self.out.append(player)
+        if self.num_players - len(self.out) <= 1:
+            self.attacker = self.defender = None
+            self.attacks, self.defenses = [], []
+            return
+        if next_attacker in self.out:
+            next_attacker = self._next_player(next_attacker)
+        self._start_bout(next_attacker)
+
+    def _next_player(self, player):
+        """The next player to the left who is still in."""
+        player = (player + 1) % self.num_players
+        while player in self.out:
+            player = (player + 1) % self.num_players
+        return player
+
+
+def _violations(state):
+    """Broken invariants of ``state``, as messages; worked out from the rules rather than the engine's masks."""
+    problems = []
+    table = sum(bit(card) for card in state.attacks + state.defenses)
+    places = state.hands + [bit(card) for card in state.deck] + [table, state.discard]
+    if sum(count(mask) for mask in places) != CARDS or FULL_DECK != sum(places):
+        problems.append("cards are lost, duplicated or in two places")
+    if any(known & ~hand for known, hand in zip(state.known, state.hands)):
+        problems.append("a known card isn't in its hand")
+    if any(state.hands[player] for player in state.out):
+        problems.append("a player who is out holds cards")
+    if state.deck and state.out:
+        problems.append("a player went out with cards left to draw")
+    if state.over:
+        if state.deck or table or len(state.out) < state.num_players - 1:
+            problems.append("game ended early")
+        return problems
+
+    if state.table != table:
+        problems.append("table doesn't match the attacks and defenses")
+    if state.to_move in state.out or state.attacker == state.defender:
+        problems.append("a player who is out is in the bout")
+    if not state.attacks and state.deck and any(count(hand) < HAND_SIZE for hand in state.hands):
+        problems.append("a hand wasn't refilled to six")
+    held = count(state.hands[state.defender]) + len(state.defenses)  # The defender's hand as the bout started
+    if not len(state.defenses) <= len(state.attacks) <= state.limit == min(MAX_ATTACKS, held):
+        problems.append(
+            f"{len(state.attacks)} attacks, {len(state.defenses)} defenses, limit {state.limit} for a hand of {held}"
+        )
+    for attack, defense in zip(state.attacks, state.defenses):
+        same_suit = suit_of(defense) == suit_of(attack) and rank_of(defense) > rank_of(attack)
+        if not same_suit and not (suit_of(defense) == state.trump != suit_of(attack)):
+            problems.append(f"{defense} doesn't beat {attack}")
+    for index, attack in enumerate(state.attacks[1:], 1):
+        if rank_of(attack) not in {rank_of(card) for card in state.attacks[:index] + state.defenses[:index]}:
+            problems.append(f"attack {attack}'s rank wasn't on the table")
+
+    actions = state.legal_actions()
+    hand = state.hands[state.to_move]
+    if not actions or any(action >= 0 and not hand & bit(action) for action in actions):
+        problems.append(f"legal actions {actions} don't fit the hand")
+    if (TAKE in actions) != (len(state.attacks) > len(state.defenses)) or (DONE in actions) != (
+        len(state.attacks) == len(state.defenses) > 0
+    ):
+        problems.append(f"passing is wrong in {actions}")
+    return problems
+
+
+def check(games=1000, seed=0, max_moves=1000):
+    """Play random legal moves in ``games`` games of two to six players; returns counts and any violations."""
+    rng = random.Random(seed)
+    moves, problems = 0, []
+    for game in range(games):
+        state = DurakState.deal(rng.randint(2, 6), rng)
+        while True:
+            problems += [f"game {game}, move {state.moves}: {problem}" for problem in _violations(state)]
+            if state.over or problems:
+                break
+            if state.moves >= max_moves:
+                problems.append(f"game {game} didn't end in {max_moves} moves")
+                break
+            state.apply(rng.choice(state.legal_actions()))
+            moves += 1
+        if problems:
+            break
+    return {"games": game + 1, "moves": moves, "problems": problems}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the Durak engine's invariants over random games")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = check(args.games, args.seed)
+    print(json.dumps(result), flush=True)
+    if result["problems"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Load generator for server.py: scripted clients playing random legal moves.
+
+Each client holds one connection and plays table after table, picking a
+random legal move each turn, until the run's time is up. Per-move latency
+is timed from sending a move to reading the reply (which includes all the
+AI moves up to the client's next turn). A monitor polls the server's
+``stats`` to track how many tables are open at once. Results are one JSON
+line::
+
+    python loadtest.py --spawn --clients 500 --duration 20
+    python loadtest.py --unix /tmp/durak.sock --clients 200 --players 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+
+class Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, line):
+        self.writer.write(line.encode() + b"\n")
+        await self.writer.drain()
+        reply = await self.reader.readline()
+        if not reply:
+            raise ConnectionError("server hung up")
+        return json.loads(reply)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def connect(args):
+    if args.unix:
+        return Connection(*await asyncio.open_unix_connection(args.unix))
+    return Connection(*await asyncio.open_connection(args.host, args.port))
+
+
+async def client(args, seed, deadline, latencies, totals):
+    rng = random.Random(seed)
+    connection = await connect(args)
+    try:
+        while time.perf_counter() < deadline:
+            state = await connection.request(f"new {args.players} {args.policy}")
+            if "error" in state:
+                totals["errors"] += 1
+                await asyncio.sleep(0.1)
+                continue
+            totals["tables"] += 1
+            while not state["over"] and time.perf_counter() < deadline:
+                action = rng.choice(state["legal"])
+                start = time.perf_counter()
+                state = await connection.request(action if action in ("take", "done") else f"play {action}")
+                latencies.append(time.perf_counter() - start)
+                if "error" in state:
+                    totals["errors"] += 1
+                    break
+            totals["games"] += state.get("over", False)
+    finally:
+        await connection.close()
+
+
+async def monitor(args, deadline, peaks):
+    """Poll the server's stats for the most tables open at once."""
+    connection = await connect(args)
+    try:
+        while time.perf_counter() < deadline:
+            stats = await connection.request("stats")
+            peaks["tables"] = max(peaks["tables"], stats["tables"])
+            if peaks["first_moves"] is None:
+                peaks["first_moves"] = stats["moves"]
+            peaks["moves"] = stats["moves"] - peaks["first_moves"]
+            await asyncio.sleep(0.25)
+    finally:
+        await connection.close()
+
+
+async def spawn_server(args):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+    command = [sys.executable, script, "--max-tables", str(args.clients + 1)]
+    command += ["--unix", args.unix] if args.unix else ["--host", args.host, "--port", str(args.port)]
+    server = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE)
+    line = await server.stdout.readline()  # {"listening": ...}
+    if not line or server.returncode is not None:
+        await server.wait()
+        raise RuntimeError(f"server.py exited with code {server.returncode} before listening")
+    return server
+
+
+async def run(args):
+    server = await spawn_server(args) if args.spawn else None
+    try:
+        latencies = []
+        totals = {"tables": 0, "games": 0, "errors": 0}
+        peaks = {"tables": 0, "first_moves": None, "moves": 0}
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(
+            monitor(args, deadline, peaks),
+            *(client(args, args.seed + i, deadline, latencies, totals) for i in range(args.clients)),
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.terminate()
+            await server.wait()
+
+    latencies = np.array(latencies or [0.0]) * 1000
+    return {
+        "clients": args.clients,
+        "concurrent_tables": peaks["tables"],
+        "tables": totals["tables"],
+        "games": totals["games"],
+        "errors": totals["errors"],
+        "client_moves": len(latencies),
+        "moves_per_sec": len(latencies) / elapsed,
+        # Every move played at the tables, the AI seats' included
+        "server_moves_per_sec": peaks["moves"] / elapsed,
+        "latency_ms": {
+            "mean": float(latencies.mean()),
+            "p50": float(np.percentile(latencies, 50)),
+            "p99": float(np.percentile(latencies, 99)),
+            "max": float(latencies.max()),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the Durak server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect over this Unix socket path instead of TCP")
+    parser.add_argument("--spawn", action="store_true", help="start server.py for the run")
+    parser.add_argument("--clients", type=int, default=100, help="concurrent connections, one table each")
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--policy", default="ai", help="AI policy for the other seats")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        result = asyncio.run(run(args))
+    except RuntimeError as error:
+        sys.exit(str(error))
+    print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,23 +11,69 @@ def create_deck():
 
 
 def select_elements(dict):
-    
-    
-    keys = list(dict.keys())
-    values = list(dict.values())
-    result = {}
-    used_numbers = set()
+    """Pick one pair per key so that no number is used twice; None if no such choice exists.
 
+    Exact: a backtracking search that always branches on the key with the
+    fewest pairs left that don't clash with the ones already picked. As in
+    Dancing Links, those counts are kept up to date as pairs are picked and
+    unpicked (through each number's list of the pairs using it) rather than
+    recounted at every step.
+    """
+    keys = list(dict.keys())
+    options = []  # Per key: its pairs, duplicates and pairs like (3, 3) dropped
+    users = {}  # Number -> the (key, option) pairs that use it
     for key in keys:
-        for pair in values[keys.index(key)]:
-            if pair[0] not in used_numbers and pair[1] not in used_numbers:
-                result[key] = pair
-                used_numbers.update(pair)
+        pairs = {}
+        for pair in dict[key]:
+            if pair[0] != pair[1]:
+                pairs.setdefault(frozenset(pair), pair)
+        for option, pair in enumerate(pairs.values()):
+            for number in pair:
+                users.setdefault(number, []).append((len(options), option))
+        options.append(list(pairs.values()))
+    blocked = [[0] * len(pairs) for pairs in options]  # How many picked pairs each option clashes with
+    live = [len(pairs) for pairs in options]  # Options with no clash, per key
+
+    def pick(key, option):
+        for number in options[key][option]:
+            for other, other_option in users[number]:
+                if not blocked[other][other_option]:
+                    live[other] -= 1
+                blocked[other][other_option] += 1
+
+    def unpick(key, option):
+        for number in options[key][option]:
+            for other, other_option in users[number]:
+                blocked[other][other_option] -= 1
+                if not blocked[other][other_option]:
+                    live[other] += 1
+
+    open_keys = set(range(len(keys)))
+    stack = []  # (key, option picked)
+    while open_keys:
+        key = min(open_keys, key=live.__getitem__)
+        if live[key]:
+            open_keys.remove(key)
+            option = blocked[key].index(0)
+            stack.append((key, option))
+            pick(key, option)
+            continue
+        # Dead end: undo picks until one has another pair to try
+        while stack:
+            key, option = stack.pop()
+            unpick(key, option)
+            option = next((later for later in range(option + 1, len(options[key])) if not blocked[key][later]), None)
+            if option is not None:
+                stack.append((key, option))
+                pick(key, option)
                 break
+            open_keys.add(key)
+        else:
+            return None
+
+    picked = {key: options[key][option] for key, option in stack}
+    return {keys[key]: picked[key] for key in range(len(keys))}
 
-    if len(used_numbers) == len(keys) * 2:
-        return result
-    return None
 
 if __name__ == "__main__":
     # print(create_deck())
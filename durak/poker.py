@@ -0,0 +1,343 @@
+"""Table-driven poker hand evaluator and equity calculator on the 52-card deck.
+
+Cards are ints 0-51 over permutations.py's deck: ``(rank - 2) * 4 + suit``
+for ranks 2-14 (``nums``) and suits in ``cards`` order, so ``card >> 2`` is
+the rank index and ``card & 3`` the suit. A hand's value is one int, higher
+is better: the category (``CATEGORIES``) in bits 20 and up, then up to five
+4-bit rank indexes for the tiebreak.
+
+Hands of five to seven cards are scored from two precomputed tables,
+without looking at the cards one by one:
+
+* ``FLUSH[mask]``, for the 13-bit mask of one suit's ranks: the best
+  straight flush or flush in it, 0 under five cards. A hand of seven or
+  fewer cards with a flush can't also hold a full house or quads, so a
+  flush beats anything the ranks alone make.
+* ``RANK_TABLES[k][index]``, the best hand from ``k`` ranks ignoring suits,
+  where ``index`` is the combinatorial index of the sorted ranks taken as a
+  multiset (``sum(comb(rank_i + i, i + 1))``), so every multiset has its
+  own slot: 50,388 of them for seven cards.
+
+``evaluate_batch`` does the same with NumPy over an ``(n, k)`` array of
+hands, and ``equity`` enumerates or samples the missing board cards across
+worker processes. ``--check`` scores all 2,598,960 five-card hands against
+the known category counts and compares six- and seven-card hands with the
+best of their five-card subsets::
+
+    python poker.py AsKs QdQh --workers 4
+    python poker.py AsKs QdQh 7c7d --board Qs8s2h
+    python poker.py --bench 2000000
+    python poker.py --check
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from math import comb
+from multiprocessing import Pool
+
+import numpy as np
+
+from permutations import cards as SUITS, lookup, nums
+
+RANKS = len(nums)
+DECK = RANKS * len(SUITS)
+CATEGORIES = [
+    "High Card", "Pair", "Two Pair", "Three of a Kind", "Straight",
+    "Flush", "Full House", "Four of a Kind", "Straight Flush",
+]
+HIGH_CARD, PAIR, TWO_PAIR, TRIPS, STRAIGHT, FLUSH_HAND, FULL_HOUSE, QUADS, STRAIGHT_FLUSH = range(len(CATEGORIES))
+NAMES = [f"{lookup[nums[card >> 2]]} of {SUITS[card & 3]}" for card in range(DECK)]
+_SHORT_RANKS = "23456789TJQKA"
+_SHORT_SUITS = "cdhs"
+BATCH = 1 << 16  # Hands per block in evaluate_batch, to keep the temporaries in cache
+# Five-card hands per category, and distinct values among them (7462 in all), High Card first
+HAND_COUNTS = [1302540, 1098240, 123552, 54912, 10200, 5108, 3744, 624, 40]
+DISTINCT_VALUES = [1277, 2860, 858, 858, 10, 1277, 156, 156, 10]
+
+
+def card_id(rank, suit):
+    """Card for a rank 2-14 and a suit index into ``SUITS``."""
+    return (rank - 2) * 4 + suit
+
+
+def card_name(card):
+    return NAMES[card]
+
+
+def parse_cards(text):
+    """Cards from short names like "AsKd" or "Qs 8s 2h" (rank 2-9/T/J/Q/K/A, suit c/d/h/s)."""
+    text = "".join(text.split())
+    if len(text) % 2:
+        raise ValueError(f"not a list of cards: {text!r}")
+    ids = []
+    for rank, suit in zip(text[::2], text[1::2]):
+        if rank.upper() not in _SHORT_RANKS or suit.lower() not in _SHORT_SUITS:
+            raise ValueError(f"not a card: {rank + suit!r}")
+        ids.append(_SHORT_RANKS.index(rank.upper()) * 4 + _SHORT_SUITS.index(suit.lower()))
+    return ids
+
+
+def category(value):
+    return CATEGORIES[value >> 20]
+
+
+def _value(category, ranks):
+    value = category
+    for index in range(5):
+        value = value << 4 | (ranks[index] if index < len(ranks) else 0)
+    return value
+
+
+def _straight(mask):
+    """Rank index of the top card of the best straight in a rank mask, or None."""
+    for high in range(RANKS - 1, 3, -1):
+        window = 0b11111 << (high - 4)
+        if mask & window == window:
+            return high
+    wheel = 1 << (RANKS - 1) | 0b1111  # A-2-3-4-5
+    return 3 if mask & wheel == wheel else None
+
+
+def _flush_value(mask):
+    if bin(mask).count("1") < 5:
+        return 0
+    high = _straight(mask)
+    if high is not None:
+        return _value(STRAIGHT_FLUSH, [high])
+    return _value(FLUSH_HAND, [rank for rank in range(RANKS - 1, -1, -1) if mask >> rank & 1][:5])
+
+
+def _rank_value(counts):
+    """Best hand from rank counts alone, ignoring flushes."""
+    groups = sorted(((n, rank) for rank, n in enumerate(counts) if n), reverse=True)
+    singles = [rank for rank in range(RANKS - 1, -1, -1) if counts[rank]]
+
+    def kickers(*exclude, n):
+        return [rank for rank in singles if rank not in exclude][:n]
+
+    top_count, top = groups[0]
+    if top_count == 4:
+        return _value(QUADS, [top] + kickers(top, n=1))
+    if top_count == 3 and len(groups) > 1 and groups[1][0] >= 2:
+        return _value(FULL_HOUSE, [top, groups[1][1]])
+    high = _straight(sum(1 << rank for rank in singles))
+    if high is not None:
+        return _value(STRAIGHT, [high])
+    if top_count == 3:
+        return _value(TRIPS, [top] + kickers(top, n=2))
+    if top_count == 2 and groups[1][0] == 2:
+        second = groups[1][1]
+        return _value(TWO_PAIR, [top, second] + kickers(top, second, n=1))
+    if top_count == 2:
+        return _value(PAIR, [top] + kickers(top, n=3))
+    return _value(HIGH_CARD, singles[:5])
+
+
+# _COMB[rank + i, i + 1] are the terms of a sorted multiset's index
+_COMB = np.array([[comb(n, k) for k in range(8)] for n in range(RANKS + 7)], dtype=np.int64)
+
+
+def _rank_table(size):
+    table = np.zeros(comb(RANKS + size - 1, size), dtype=np.int32)
+    for ranks in itertools.combinations_with_replacement(range(RANKS), size):
+        counts = [0] * RANKS
+        for rank in ranks:
+            counts[rank] += 1
+        if max(counts) <= 4:
+            table[sum(comb(rank + i, i + 1) for i, rank in enumerate(ranks))] = _rank_value(counts)
+    return table
+
+
+FLUSH = np.array([_flush_value(mask) for mask in range(1 << RANKS)], dtype=np.int32)
+RANK_TABLES = {size: _rank_table(size) for size in (5, 6, 7)}
+
+
+def evaluate(hand):
+    """Value of the best five-card hand among five to seven cards."""
+    ranks = sorted(card >> 2 for card in hand)
+    value = int(RANK_TABLES[len(ranks)][sum(int(_COMB[rank + i, i + 1]) for i, rank in enumerate(ranks))])
+    suit_masks = [0] * len(SUITS)
+    for card in hand:
+        suit_masks[card & 3] |= 1 << (card >> 2)
+    return max(value, *(int(FLUSH[mask]) for mask in suit_masks))
+
+
+def evaluate_batch(hands):
+    """Values for an ``(n, k)`` integer array of hands, five to seven cards each, as an int32 array."""
+    hands = np.asarray(hands)
+    if hands.ndim != 2 or not 5 <= hands.shape[1] <= 7:
+        raise ValueError("hands must be an (n, 5), (n, 6) or (n, 7) array")
+    size = hands.shape[1]
+    table = RANK_TABLES[size]
+    positions = np.arange(size)
+    terms = _COMB[:, 1:size + 1]
+    values = np.empty(len(hands), dtype=np.int32)
+    for start in range(0, len(hands), BATCH):
+        block = hands[start:start + BATCH].astype(np.intp)
+        ranks = block >> 2
+        suits = block & 3
+        sorted_ranks = np.sort(ranks, axis=1)
+        best = table[terms[sorted_ranks + positions, positions].sum(axis=1)]
+        rank_bits = 1 << ranks
+        for suit in range(len(SUITS)):
+            masks = np.where(suits == suit, rank_bits, 0).sum(axis=1)
+            np.maximum(best, FLUSH[masks], out=best)
+        values[start:start + BATCH] = best
+    return values
+
+
+def _score(holes, board, boards):
+    """Wins and tie shares per player over ``boards`` completing ``board``."""
+    boards = np.asarray(boards, dtype=np.int8)
+    values = []
+    for hole in holes:
+        known = np.broadcast_to(np.array(hole + board, dtype=np.int8), (len(boards), 2 + len(board)))
+        values.append(evaluate_batch(np.hstack([known, boards])))
+    values = np.stack(values)
+    winners = values == values.max(axis=0)
+    splits = winners.sum(axis=0)
+    wins = (winners & (splits == 1)).sum(axis=1)
+    ties = (winners * np.where(splits > 1, 1 / splits, 0)).sum(axis=1)
+    return wins, ties
+
+
+def _score_job(job):
+    holes, board, boards, rest, samples, seed = job
+    if boards is None:  # Draw this job's share of random boards
+        rng = np.random.default_rng(seed)
+        need = 5 - len(board)
+        picks = rng.random((samples, len(rest))).argpartition(need, axis=1)[:, :need]
+        boards = np.array(rest, dtype=np.int8)[picks]
+    return _score(holes, board, boards)
+
+
+def equity(holes, board=(), samples=None, workers=0, seed=None, chunk=BATCH):
+    """Each player's share of the pot over the rest of the board.
+
+    ``holes`` are the players' two-card hands and ``board`` the community
+    cards dealt so far. Every way to finish the board is enumerated, or
+    ``samples`` random ones are drawn. ``workers`` > 0 spreads the boards
+    over that many processes, in jobs of ``chunk`` boards.
+    """
+    holes = [tuple(hole) for hole in holes]
+    board = tuple(board)
+    dead = [card for hole in holes for card in hole] + list(board)
+    if len(set(dead)) != len(dead):
+        raise ValueError("a card is dealt twice")
+    rest = [card for card in range(DECK) if card not in dead]
+    need = 5 - len(board)
+
+    if samples is None:
+        total = comb(len(rest), need)
+        boards = np.fromiter(
+            itertools.chain.from_iterable(itertools.combinations(rest, need)), dtype=np.int8, count=total * need,
+        ).reshape(total, need)
+        jobs = [(holes, board, boards[start:start + chunk], rest, None, None) for start in range(0, total, chunk)]
+    else:
+        total = samples
+        seeds = np.random.SeedSequence(seed).spawn((samples + chunk - 1) // chunk)
+        jobs = [
+            (holes, board, None, rest, min(chunk, samples - start), job_seed)
+            for start, job_seed in zip(range(0, samples, chunk), seeds)
+        ]
+
+    if workers:
+        with Pool(workers) as pool:
+            results = pool.map(_score_job, jobs)
+    else:
+        results = [_score_job(job) for job in jobs]
+    wins = sum(result[0] for result in results)
+    ties = sum(result[1] for result in results)
+    return {
+        "equity": ((wins + ties) / total).tolist(),
+        "win": (wins / total).tolist(),
+        "tie": (ties / total).tolist(),
+        "boards": total,
+        "exhaustive": samples is None,
+    }
+
+
+def check(samples=100_000, seed=0):
+    """Compare the evaluator with known five-card counts and with best-of-subsets on random larger hands."""
+    problems = []
+    hands = np.fromiter(
+        itertools.chain.from_iterable(itertools.combinations(range(DECK), 5)), dtype=np.int8, count=comb(DECK, 5) * 5,
+    ).reshape(-1, 5)
+    values = evaluate_batch(hands)
+    counts = np.bincount(values >> 20, minlength=len(CATEGORIES)).tolist()
+    distinct = np.bincount(np.unique(values) >> 20, minlength=len(CATEGORIES)).tolist()
+    if counts != HAND_COUNTS:
+        problems.append({"five_card_counts": counts})
+    if distinct != DISTINCT_VALUES:
+        problems.append({"five_card_distinct_values": distinct})
+
+    rng = np.random.default_rng(seed)
+    for size in (6, 7):
+        hands = rng.random((samples, DECK)).argpartition(size, axis=1)[:, :size].astype(np.int8)
+        subsets = np.array(list(itertools.combinations(range(size), 5)))
+        best = evaluate_batch(hands[:, subsets].reshape(-1, 5)).reshape(samples, len(subsets)).max(axis=1)
+        wrong = np.flatnonzero(evaluate_batch(hands) != best).tolist()
+        wrong += [i for i in range(min(samples, 1000)) if evaluate(hands[i].tolist()) != best[i]]  # Scalar path too
+        if wrong:
+            problems.append({f"{size}_card_hands": [hands[i].tolist() for i in wrong[:5]]})
+    return {"five_card_hands": len(values), "distinct_values": sum(distinct), "samples": samples, "problems": problems}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poker equity calculator")
+    parser.add_argument("holes", nargs="*", help="two-card hands, like AsKs QdQh")
+    parser.add_argument("--board", default="", help="community cards so far, like Qs8s2h")
+    parser.add_argument("--samples", type=int, help="random boards to draw instead of enumerating them all")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes; 0 runs in-process")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--bench", type=int, help="time evaluate_batch on this many random 7-card hands instead")
+    parser.add_argument("--check", action="store_true", help="check the evaluator against known hand counts instead")
+    args = parser.parse_args()
+
+    if args.check:
+        result = check(seed=args.seed or 0)
+        print(json.dumps(result), flush=True)
+        if result["problems"]:
+            raise SystemExit(1)
+        return
+
+    if args.bench:
+        rng = np.random.default_rng(args.seed)
+        hands = rng.random((args.bench, DECK)).argpartition(7, axis=1)[:, :7].astype(np.int8)
+        start = time.perf_counter()
+        values = evaluate_batch(hands)
+        elapsed = time.perf_counter() - start
+        counts = np.bincount(values >> 20, minlength=len(CATEGORIES))
+        print(json.dumps({
+            "hands": args.bench,
+            "hands_per_sec": args.bench / elapsed,
+            "categories": {name: int(n) / args.bench for name, n in zip(CATEGORIES, counts)},
+        }), flush=True)
+        return
+
+    if len(args.holes) < 2:
+        parser.error("give at least two hands")
+    holes = [parse_cards(hole) for hole in args.holes]
+    if any(len(hole) != 2 for hole in holes):
+        parser.error("hands are two cards each")
+    board = parse_cards(args.board)
+    if len(board) > 5:
+        parser.error("at most five board cards")
+
+    start = time.perf_counter()
+    result = equity(holes, board, args.samples, args.workers, args.seed)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "hands": args.holes,
+        "board": args.board,
+        **result,
+        "seconds": elapsed,
+        "boards_per_sec": result["boards"] / elapsed,
+    }), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Time-budgeted information-set Monte Carlo search for Durak.
+
+``MonteCarloPolicy`` only looks at what its player could know: its own
+hand, the table, the discard pile, the face-up trump and the cards others
+were seen to pick up. Each rollout deals the remaining unseen cards at
+random into the other hands and the deck (a determinization consistent with
+all of that), picks a root action by UCB1, and plays the game out with
+``selfplay.ai_policy``. The most visited action is played.
+
+Rollouts run until a time budget or rollout count is used up, optionally
+spread over worker processes that each search independently and merge
+their counts at the end. ``stats()`` reports rollouts/sec and decision
+latency, for tuning towards a budget of 200 ms per move::
+
+    python search.py --games 50 --budget 0.2 --workers 4
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from cards import FULL_DECK, bit, cards_of, count, mask_of
+from engine import DurakState
+from selfplay import ai_policy
+
+DRAW_SCORE = 0.5
+
+
+def determinize(state, player, rng):
+    """Copy of ``state`` with everything ``player`` can't see re-dealt at random."""
+    sample = state.copy()
+    seen = state.hands[player] | state.discard | state.table
+    for other, known in enumerate(state.known):
+        if other != player:
+            seen |= known
+    if state.deck:
+        seen |= bit(state.deck[0])  # The face-up trump stays at the bottom
+    unseen = list(cards_of(FULL_DECK & ~seen))
+    rng.shuffle(unseen)
+
+    for other in range(state.num_players):
+        if other != player:
+            hidden = count(state.hands[other]) - count(state.known[other])
+            sample.hands[other] = state.known[other] | mask_of(unseen[:hidden])
+            del unseen[:hidden]
+    if state.deck:
+        sample.deck = [state.deck[0]] + unseen
+    return sample
+
+
+def rollout(state, rng, policy=ai_policy):
+    while not state.over:
+        state.apply(policy(state, rng))
+    return state.durak
+
+
+def search(state, player, actions, budget, rollouts, seed, exploration=1.0):
+    """UCB1 over ``actions`` at the root; returns per-action ``(visits, score)`` lists and rollouts played."""
+    rng = random.Random(seed)
+    visits = [0] * len(actions)
+    scores = [0.0] * len(actions)
+    deadline = time.perf_counter() + budget if budget is not None else None
+    played = 0
+    while (rollouts is None or played < rollouts) and (deadline is None or time.perf_counter() < deadline):
+        played += 1
+        if played <= len(actions):
+            choice = played - 1  # Try every action once first
+        else:
+            log_total = math.log(played)
+            choice = max(
+                range(len(actions)),
+                key=lambda i: scores[i] / visits[i] + exploration * math.sqrt(log_total / visits[i]),
+            )
+        sample = determinize(state, player, rng)
+        sample.apply(actions[choice])
+        durak = rollout(sample, rng)
+        visits[choice] += 1
+        scores[choice] += DRAW_SCORE if durak is None else float(durak != player)
+    return visits, scores, played
+
+
+def _search_job(job):
+    return search(*job)
+
+
+class MonteCarloPolicy:
+    """Policy for ``selfplay``: ``policy(state, rng) -> action``.
+
+    ``budget`` is seconds per decision and ``rollouts`` a cap on rollouts
+    per decision (per worker); either may be None, but not both.
+    ``workers`` > 0 runs the search in that many processes.
+    """
+
+    def __init__(self, budget=0.2, rollouts=None, workers=0, exploration=1.0, margin=0.01):
+        if budget is None and rollouts is None:
+            raise ValueError("need a time budget or a rollout count")
+        self.budget = budget
+        self.rollouts = rollouts
+        self.workers = workers
+        self.exploration = exploration
+        self.margin = margin  # Held back from the budget for dispatch and merging
+        self._pool = Pool(workers) if workers else None
+        self.latencies = []
+        self.total_rollouts = 0
+        self.search_time = 0.0
+
+    def __call__(self, state, rng):
+        start = time.perf_counter()
+        actions = state.legal_actions()
+        if len(actions) == 1:
+            return actions[0]
+
+        player = state.to_move
+        budget = None if self.budget is None else max(0.0, self.budget - self.margin)
+        if self._pool is None:
+            results = [search(state, player, actions, budget, self.rollouts, rng.random(), self.exploration)]
+        else:
+            jobs = [
+                (state, player, actions, budget, self.rollouts, rng.random(), self.exploration)
+                for _ in range(self.workers)
+            ]
+            results = self._pool.map(_search_job, jobs)
+
+        visits = np.sum([result[0] for result in results], axis=0)
+        elapsed = time.perf_counter() - start
+        self.latencies.append(elapsed)
+        self.total_rollouts += sum(result[2] for result in results)
+        self.search_time += elapsed
+        return actions[int(np.argmax(visits))]
+
+    def stats(self):
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            "decisions": len(self.latencies),
+            "rollouts": self.total_rollouts,
+            "rollouts_per_sec": self.total_rollouts / self.search_time if self.search_time else 0.0,
+            "rollouts_per_decision": self.total_rollouts / max(1, len(self.latencies)),
+            "latency_ms": {
+                "mean": float(latencies.mean()),
+                "p50": float(np.percentile(latencies, 50)),
+                "p99": float(np.percentile(latencies, 99)),
+                "max": float(latencies.max()),
+            },
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo search AI against AIOpponent")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--budget", type=float, default=0.2, help="seconds per decision")
+    parser.add_argument("--rollouts", type=int, help="cap on rollouts per decision (per worker)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="search processes; 0 searches in-process")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    policy = MonteCarloPolicy(args.budget, args.rollouts, args.workers)
+    durak_count = draws = 0
+    for game in range(args.games):
+        rng = random.Random(args.seed + game)
+        state = DurakState.deal(2, rng)
+        seat = game % 2  # Alternate who gets dealt which hand
+        while not state.over:
+            move = policy if state.to_move == seat else ai_policy
+            state.apply(move(state, rng))
+        durak_count += state.durak == seat
+        draws += state.durak is None
+        print(json.dumps({"game": game, "search_durak": state.durak == seat, "draw": state.durak is None}), flush=True)
+    policy.close()
+
+    print(json.dumps({
+        "final": True,
+        "games": args.games,
+        "search_escape_rate": 1 - durak_count / args.games,
+        "draw_rate": draws / args.games,
+        **policy.stats(),
+    }), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Headless Durak self-play: pit policies against each other over many seeded deals.
+
+A policy is any ``policy(state, rng) -> action`` callable on a
+``engine.DurakState``; ``POLICIES`` names the built-in ones. Seats rotate
+from game to game so no policy keeps the first-attack advantage. Games are
+farmed out to a process pool in batches, and progress plus a final summary
+(escape and durak rates per policy, game length, games/sec) are printed as
+JSON lines::
+
+    python selfplay.py --games 100000 --players 2 --policies ai random
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from multiprocessing import Pool
+
+from cards import SUIT_MASKS, cards_of
+from durak import AIOpponent
+from endgame import MOVE_MAX_NODES, EndgameSolver
+from engine import DONE, TAKE, DurakState
+
+
+def ai_policy(state, rng):
+    """``AIOpponent``'s choices: lead and defend with the weakest card, throw in but keep trumps."""
+    hand = state.hands[state.to_move]
+    if state.to_move == state.defender:
+        card = AIOpponent(hand, state.trump).choose_defense_card(state.attacks[-1])
+        return TAKE if card is None else card
+    if not state.attacks:
+        return AIOpponent(hand, state.trump).choose_attack_card(state.attacks + state.defenses)
+    # Throw in the weakest card that matches the table, but don't waste trumps on it
+    throw_ins = state.playable() & ~SUIT_MASKS[state.trump]
+    card = AIOpponent(throw_ins, state.trump).choose_attack_card(state.attacks + state.defenses)
+    return DONE if card is None else card
+
+
+class EndgamePolicy:
+    """``ai_policy`` until the deck runs out in a two-player game, then the exact endgame solver.
+
+    One solver per trump suit is kept, so its transposition table outlives
+    single games; ``capacity`` bounds each table and ``max_nodes`` each
+    move. Positions the solver gives up on are played by ``ai_policy`` too.
+    """
+
+    def __init__(self, capacity=1_000_000, max_nodes=MOVE_MAX_NODES):
+        self.capacity = capacity
+        self.max_nodes = max_nodes
+        self.solvers = {}  # Trump suit -> EndgameSolver
+
+    @staticmethod
+    def solves(state):
+        """Whether ``state`` goes to the solver rather than ``ai_policy``."""
+        return not state.deck and state.num_players == 2
+
+    def __call__(self, state, rng):
+        if not self.solves(state):
+            return ai_policy(state, rng)
+        if state.trump not in self.solvers:
+            self.solvers[state.trump] = EndgameSolver(state.trump, self.capacity, self.max_nodes)
+        action = self.solvers[state.trump].best_action(state)
+        return ai_policy(state, rng) if action is None else action
+
+
+endgame_policy = EndgamePolicy()
+
+
+def random_policy(state, rng):
+    return rng.choice(state.legal_actions())
+
+
+POLICIES = {"ai": ai_policy, "endgame": endgame_policy, "random": random_policy}
+
+
+def play_game(policies, seed, max_moves=10_000):
+    """Play one seeded game; returns ``(durak, bouts, moves)``, durak None for a draw or a stalled game."""
+    rng = random.Random(seed)
+    state = DurakState.deal(len(policies), rng)
+    while not state.over:
+        if state.moves >= max_moves:
+            return None, state.bouts, state.moves
+        state.apply(policies[state.to_move](state, rng))
+    return state.durak, state.bouts, state.moves
+
+
+def play_batch(job):
+    """Play ``games`` games from ``first_seed`` with seats rotating, and total up the results."""
+    first_seed, games, names = job
+    seats = len(names)
+    totals = {
+        "games": games,
+        "draws": 0,
+        "bouts": 0,
+        "moves": 0,
+        "seated": {name: 0 for name in names},
+        "durak": {name: 0 for name in names},
+        "durak_by_seat": [0] * seats,
+    }
+    for game in range(games):
+        seed = first_seed + game
+        seating = [names[(seat + seed) % seats] for seat in range(seats)]
+        durak, bouts, moves = play_game([POLICIES[name] for name in seating], seed)
+        totals["bouts"] += bouts
+        totals["moves"] += moves
+        for name in seating:
+            totals["seated"][name] += 1
+        if durak is None:
+            totals["draws"] += 1
+        else:
+            totals["durak"][seating[durak]] += 1
+            totals["durak_by_seat"][durak] += 1
+    return totals
+
+
+def merge(total, batch):
+    if total is None:
+        return batch
+    for key in ("games", "draws", "bouts", "moves"):
+        total[key] += batch[key]
+    for key in ("seated", "durak"):
+        for name, value in batch[key].items():
+            total[key][name] += value
+    total["durak_by_seat"] = [a + b for a, b in zip(total["durak_by_seat"], batch["durak_by_seat"])]
+    return total
+
+
+def summary(total, elapsed, workers):
+    games = total["games"]
+    return {
+        "games": games,
+        "escape_rate": {
+            name: 1 - total["durak"][name] / seated for name, seated in total["seated"].items() if seated
+        },
+        "durak_rate": {name: total["durak"][name] / seated for name, seated in total["seated"].items() if seated},
+        "durak_by_seat": [count / games for count in total["durak_by_seat"]],
+        "draw_rate": total["draws"] / games,
+        "bouts_mean": total["bouts"] / games,
+        "moves_mean": total["moves"] / games,
+        "games_per_sec": games / elapsed,
+        "games_per_sec_per_core": games / elapsed / workers,
+        "games_per_hour": games / elapsed * 3600,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Durak self-play tournament")
+    parser.add_argument("--games", type=int, default=10_000)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=["ai"],
+                        help="one policy per seat, or a single policy for all of them")
+    parser.add_argument("--seed", type=int, default=0, help="first seed; games use seed, seed + 1, ...")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch", type=int, default=500, help="games per pool task")
+    args = parser.parse_args()
+
+    names = args.policies * args.players if len(args.policies) == 1 else args.policies
+    if len(names) != args.players:
+        parser.error(f"give one policy or {args.players} of them")
+
+    jobs = [
+        (args.seed + first, min(args.batch, args.games - first), names)
+        for first in range(0, args.games, args.batch)
+    ]
+    total = None
+    start = time.perf_counter()
+    with Pool(args.workers) as pool:
+        for done, batch in enumerate(pool.imap_unordered(play_batch, jobs), 1):
+            total = merge(total, batch)
+            if done < len(jobs):
+                print(json.dumps(summary(total, time.perf_counter() - start, args.workers)), flush=True)
+
+    print(json.dumps({"final": True, **summary(total, time.perf_counter() - start, args.workers)}), flush=True)
+
+
+if __name__ == "__main__":
+    main()
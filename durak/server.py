@@ -0,0 +1,292 @@
+"""Asyncio Durak server: many tables, one human seat each, over a line protocol.
+
+Each connection plays one table at a time as seat 0 against AI seats. The
+tables run on engine.py's ``DurakState`` (``DurakGame``'s rules without its
+stdin/print loop), and the AI seats use a selfplay.py policy. The greedy
+policies take microseconds and run right on the event loop. The endgame
+solver is CPU-bound Python, so its moves go to a pool of worker processes,
+one per core, each with its own solvers; a node budget per move keeps a
+hard endgame from holding a worker for seconds (past it the move is the
+greedy one). A solve is only sent when a worker is free: with every worker
+busy the move is the greedy one, played on the loop, so latency stays
+bounded however many tables are in their endgame. ``stats`` reports the
+solves in flight and how many moves fell back.
+
+Commands are lines of text, replies one JSON object per line::
+
+    new [players] [ai|endgame|random]   deal a new table -> state
+    play <card>                         e.g. "play 7 of Spades" -> state
+    take / done                         pick up / end the bout -> state
+    state                               the current table again
+    stats                               server-wide counters
+    quit
+
+A state reply holds the seat's hand, the table, everyone's card counts,
+the AI moves made since the last reply (``moves``), and ``legal``: the
+cards that may be played, plus "take" or "done" when passing is allowed.
+Anything wrong gets ``{"error": ...}``. Run with::
+
+    python server.py --port 8765
+    python server.py --unix /tmp/durak.sock
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cards import SUITS, card_name, count, hand_names, parse_card
+from endgame import MOVE_MAX_NODES
+from engine import DONE, TAKE, DurakState
+from selfplay import POLICIES, EndgamePolicy, ai_policy
+
+SEAT = 0  # The connection's seat at its table
+PASSES = {"take": TAKE, "done": DONE}
+SOLVER_CAPACITY = 50_000  # Table entries per trump suit and worker; the default million would grow for good
+BACKLOG = 1024  # Pending connections, so a load test's clients can all connect at once
+
+
+def action_name(action):
+    if action == TAKE:
+        return "take"
+    if action == DONE:
+        return "done"
+    return card_name(action)
+
+
+class Table:
+    def __init__(self, table_id, players, policy_name, policy, seed):
+        self.id = table_id
+        self.policy_name = policy_name
+        self.policy = policy
+        self.rng = random.Random(seed)
+        self.state = DurakState.deal(players, self.rng)
+        self.moves = []  # AI moves since the last reply
+
+    def state_message(self):
+        state = self.state
+        legal = [] if state.over or state.to_move != SEAT else state.legal_actions()
+        message = {
+            "table": self.id,
+            "seat": SEAT,
+            "trump": SUITS[state.trump],
+            "trump_card": card_name(state.trump_card),
+            "deck": len(state.deck),
+            "hand": hand_names(state.hands[SEAT]),
+            "hands": [count(hand) for hand in state.hands],
+            "attacker": state.attacker,
+            "defender": state.defender,
+            "attacks": [card_name(card) for card in state.attacks],
+            "defenses": [card_name(card) for card in state.defenses],
+            "to_move": None if state.over else state.to_move,
+            "legal": [action_name(action) for action in legal],
+            "moves": self.moves,
+            "over": state.over,
+            "durak": state.durak,
+        }
+        self.moves = []
+        return message
+
+
+_solver = None  # The endgame policy in a solver worker process
+
+
+def _start_solver(capacity, max_nodes):
+    global _solver
+    _solver = EndgamePolicy(capacity, max_nodes)
+
+
+def _solve(state):
+    return _solver(state, None)
+
+
+class DurakServer:
+    def __init__(self, max_tables=10_000, seed=None, solver_workers=None, solver_nodes=MOVE_MAX_NODES):
+        self.max_tables = max_tables
+        self.seeds = random.Random(seed)
+        self.ids = itertools.count(1)
+        self.tables = {}  # Open tables by id
+        self.policies = {**POLICIES, "endgame": EndgamePolicy(SOLVER_CAPACITY, solver_nodes)}
+        self.solver_workers = solver_workers or os.cpu_count()
+        self.solver_pool = ProcessPoolExecutor(
+            self.solver_workers, initializer=_start_solver, initargs=(SOLVER_CAPACITY, solver_nodes),
+        )
+        self.solver_queue = 0  # Solves sent to the pool and not back yet
+        self.solver_queue_peak = 0
+        self.solves = 0
+        self.solver_fallbacks = 0  # Endgame moves played greedily because every worker was busy
+        self.started = time.perf_counter()
+        self.connections = 0
+        self.tables_dealt = 0
+        self.games_finished = 0
+        self.moves = 0
+
+    async def handle(self, reader, writer):
+        """One connection: read commands until it quits or hangs up."""
+        self.connections += 1
+        table = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                words = line.decode(errors="replace").split()
+                if not words:
+                    continue
+                command, args = words[0].lower(), words[1:]
+                if command == "quit":
+                    break
+                try:
+                    if command == "new":
+                        self._close(table)
+                        table = None
+                        table = await self._new_table(args)
+                        reply = table.state_message()
+                    elif command == "stats":
+                        reply = self.stats()
+                    elif table is None:
+                        raise ValueError("no table; send 'new' first")
+                    elif command == "state":
+                        reply = table.state_message()
+                    elif command == "play" or command in PASSES:
+                        await self._move(table, command, args)
+                        reply = table.state_message()
+                    else:
+                        raise ValueError(f"unknown command {command!r}")
+                except ValueError as error:
+                    reply = {"error": str(error)}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._close(table)
+            self.connections -= 1
+            writer.close()
+
+    async def _new_table(self, args):
+        players = int(args[0]) if args and args[0].isdigit() else 2
+        policy = args[1].lower() if len(args) > 1 else "ai"
+        if not 2 <= players <= 6:
+            raise ValueError("2 to 6 players")
+        if policy not in self.policies:
+            raise ValueError(f"policy must be one of {', '.join(sorted(self.policies))}")
+        if len(self.tables) >= self.max_tables:
+            raise ValueError("server full")
+
+        table = Table(next(self.ids), players, policy, self.policies[policy], self.seeds.random())
+        self.tables[table.id] = table
+        self.tables_dealt += 1
+        await self._ai_turns(table)  # An AI may hold the lowest trump and lead
+        return table
+
+    async def _move(self, table, command, args):
+        state = table.state
+        if state.over:
+            raise ValueError("game over; send 'new' for another")
+        if state.to_move != SEAT:
+            raise ValueError("not your turn")
+        if command == "play":
+            action = parse_card(" ".join(args))
+            if action is None:
+                raise ValueError(f"not a card: {' '.join(args)!r}")
+        else:
+            action = PASSES[command]
+        if action not in state.legal_actions():
+            raise ValueError(f"{action_name(action)} isn't a legal move")
+
+        state.apply(action)
+        self.moves += 1
+        await self._ai_turns(table)
+        if state.over:
+            self.games_finished += 1
+
+    async def _ai_turns(self, table):
+        """Play the AI seats until it's the connection's turn again or the game ends."""
+        state = table.state
+        loop = asyncio.get_running_loop()
+        while not state.over and state.to_move != SEAT:
+            player = state.to_move
+            solving = isinstance(table.policy, EndgamePolicy) and table.policy.solves(state)
+            if solving and self.solver_queue >= self.solver_workers:
+                # Every worker is busy: waiting behind other tables' solves would cost more than the solve is worth
+                action = ai_policy(state, table.rng)
+                self.solver_fallbacks += 1
+            elif solving:
+                self.solver_queue += 1
+                self.solver_queue_peak = max(self.solver_queue_peak, self.solver_queue)
+                try:
+                    action = await loop.run_in_executor(self.solver_pool, _solve, state)
+                finally:
+                    self.solver_queue -= 1
+                self.solves += 1
+            else:
+                action = table.policy(state, table.rng)
+            state.apply(action)
+            self.moves += 1
+            table.moves.append({"player": player, "action": action_name(action)})
+
+    def _close(self, table):
+        if table is not None:
+            self.tables.pop(table.id, None)
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "connections": self.connections,
+            "tables": len(self.tables),
+            "tables_dealt": self.tables_dealt,
+            "games_finished": self.games_finished,
+            "moves": self.moves,
+            "moves_per_sec": self.moves / elapsed if elapsed else 0.0,
+            "solver_workers": self.solver_workers,
+            "solver_queue": self.solver_queue,
+            "solver_queue_peak": self.solver_queue_peak,
+            "solves": self.solves,
+            "solver_fallbacks": self.solver_fallbacks,
+            "uptime": elapsed,
+        }
+
+    async def serve(self, host="127.0.0.1", port=8765, unix=None):
+        if unix:
+            server = await asyncio.start_unix_server(self.handle, unix, backlog=BACKLOG)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, backlog=BACKLOG)
+        address = unix or f"{host}:{port}"
+        print(json.dumps({"listening": address}), flush=True)
+        # SIGTERM ends the run like Ctrl-C does, so the solver pool is shut down rather than orphaned
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            self.solver_pool.shutdown(cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-table Durak server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--max-tables", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, help="seeds every table's deal, for reproducible runs")
+    parser.add_argument("--solver-workers", type=int, help="endgame solver processes (default: one per core)")
+    parser.add_argument("--solver-nodes", type=int, default=MOVE_MAX_NODES,
+                        help="node budget per endgame move, past which the AI plays greedily")
+    args = parser.parse_args()
+
+    server = DurakServer(args.max_tables, args.seed, args.solver_workers, args.solver_nodes)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,28 @@
+import argparse
 import pygame
 import random
 import math
+import os
+import time
+from collections import defaultdict
+
+from rpsls_arrays import TYPES, ArraySimulation, beats_matrix
+from rpsls_log import RunLog, RunRecorder
+from rpsls_render import MODES, IconRenderer
 
 # Initialize Pygame
 pygame.init()
 
 # Screen dimensions
 WIDTH, HEIGHT = 800, 800  # Larger screen size
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Rock Paper Scissors Lizard Spock Battle")
 
 # FPS setting
-FPS = 60
+FPS = 60  # Display rate
+STEPS_PER_SECOND = 60  # Simulation rate at 1x speed, independent of how fast frames are drawn
+MAX_FRAME_TIME = 0.25  # Longest stall (s) the simulation catches up on, so a hiccup can't snowball
+MAX_STEPS_PER_FRAME = 2000  # Fast-forward limit; simulated time beyond it is dropped
 N = 20  # Number of each icon per type
+SPATIAL_HASH = True  # Only test icons in neighboring grid cells instead of every pair
 
 # Function to scale images while preserving aspect ratio
 def scale_image(image, target_height):
@@ -21,13 +31,17 @@ def scale_image(image, target_height):
     new_width = int(target_height * aspect_ratio)
     return pygame.transform.scale(image, (new_width, target_height))
 
-# Load and scale PNG images
+# Load and scale PNG images (relative to this file, so it can be run or imported from anywhere)
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
 TARGET_HEIGHT = 25  # Smaller icons
-ROCK_IMG = scale_image(pygame.image.load("rock.png"), TARGET_HEIGHT)
-PAPER_IMG = scale_image(pygame.image.load("paper.png"), TARGET_HEIGHT)
-SCISSORS_IMG = scale_image(pygame.image.load("scissors.png"), TARGET_HEIGHT)
-LIZARD_IMG = scale_image(pygame.image.load("lizard.png"), TARGET_HEIGHT)
-SPOCK_IMG = scale_image(pygame.image.load("spock.png"), TARGET_HEIGHT)
+ROCK_IMG = scale_image(pygame.image.load(os.path.join(ASSET_DIR, "rock.png")), TARGET_HEIGHT)
+PAPER_IMG = scale_image(pygame.image.load(os.path.join(ASSET_DIR, "paper.png")), TARGET_HEIGHT)
+SCISSORS_IMG = scale_image(pygame.image.load(os.path.join(ASSET_DIR, "scissors.png")), TARGET_HEIGHT)
+LIZARD_IMG = scale_image(pygame.image.load(os.path.join(ASSET_DIR, "lizard.png")), TARGET_HEIGHT)
+SPOCK_IMG = scale_image(pygame.image.load(os.path.join(ASSET_DIR, "spock.png")), TARGET_HEIGHT)
+
+TYPE_IMAGES = [ROCK_IMG, PAPER_IMG, SCISSORS_IMG, LIZARD_IMG, SPOCK_IMG]  # Indexed like rpsls_arrays.TYPES
+TYPE_IDS = {name: type_id for type_id, name in enumerate(TYPES)}
 
 ICON_WIDTH = ROCK_IMG.get_width()
 ICON_HEIGHT = ROCK_IMG.get_height()
@@ -49,6 +63,7 @@ class Icon:
     def __init__(self, x, y, icon_type):
         self.x = x
         self.y = y
+        self.prev_x, self.prev_y = x, y  # Position before the last step, for render interpolation
 
         # Velocity initialized towards the center with some randomness
         angle = math.atan2(CENTER_Y - y, CENTER_X - x)
@@ -59,6 +74,8 @@ class Icon:
         self.type = icon_type
 
     def move(self):
+        self.prev_x, self.prev_y = self.x, self.y
+
         # Small random chance to change direction
         if random.random() < 0.01:  # 1% chance per frame
             random_angle = random.uniform(0, 2 * math.pi)
@@ -84,17 +101,12 @@ class Icon:
             self.y = HEIGHT - ICON_HEIGHT
             self.vy = -abs(self.vy)
 
-    def draw(self, screen):
-        if self.type == "rock":
-            screen.blit(ROCK_IMG, (self.x, self.y))
-        elif self.type == "paper":
-            screen.blit(PAPER_IMG, (self.x, self.y))
-        elif self.type == "scissors":
-            screen.blit(SCISSORS_IMG, (self.x, self.y))
-        elif self.type == "lizard":
-            screen.blit(LIZARD_IMG, (self.x, self.y))
-        elif self.type == "spock":
-            screen.blit(SPOCK_IMG, (self.x, self.y))
+    def draw(self, screen, alpha=1.0):
+        screen.blit(TYPE_IMAGES[TYPE_IDS[self.type]], self.position(alpha))
+
+    def position(self, alpha=1.0):
+        """Position ``alpha`` of the way from the previous step's to the current one."""
+        return self.prev_x + (self.x - self.prev_x) * alpha, self.prev_y + (self.y - self.prev_y) * alpha
 
 def handle_collision(icon1, icon2):
     # Calculate the direction of the collision
@@ -103,7 +115,7 @@ def handle_collision(icon1, icon2):
     distance = math.sqrt(dx**2 + dy**2)
 
     if distance == 0 or distance >= ICON_WIDTH:  # Prevent division by zero or no collision
-        return
+        return False
 
     # Resolve overlap by moving icons apart
     overlap = ICON_WIDTH - distance
@@ -135,6 +147,66 @@ def handle_collision(icon1, icon2):
             icon2.type = icon1.type  # icon1 wins
         elif icon1.type in RPSLS_RULES[icon2.type]:
             icon1.type = icon2.type  # icon2 wins
+    return True
+
+class SpatialHash:
+    """Uniform grid of ICON_WIDTH cells; icons closer than ICON_WIDTH are always in adjacent cells."""
+
+    def __init__(self, icons, cell_size):
+        self.icons = icons
+        self.cell_size = cell_size
+        self.cells = defaultdict(set)
+        self.cell_of = []
+        for index, icon in enumerate(icons):
+            cell = self._cell(icon)
+            self.cells[cell].add(index)
+            self.cell_of.append(cell)
+
+    def _cell(self, icon):
+        return int(icon.x // self.cell_size), int(icon.y // self.cell_size)
+
+    def move(self, index):
+        """Re-file an icon after its position changed; returns whether it changed cells."""
+        cell = self._cell(self.icons[index])
+        if cell == self.cell_of[index]:
+            return False
+        self.cells[self.cell_of[index]].discard(index)
+        self.cells[cell].add(index)
+        self.cell_of[index] = cell
+        return True
+
+    def near(self, icon, after):
+        """Sorted indices greater than ``after`` in the 3x3 cells around the icon."""
+        cx, cy = self._cell(icon)
+        found = []
+        for x in (cx - 1, cx, cx + 1):
+            for y in (cy - 1, cy, cy + 1):
+                cell = self.cells.get((x, y))
+                if cell:
+                    found.extend(index for index in cell if index > after)
+        return sorted(found)
+
+def handle_collisions(icons):
+    """Resolve every colliding pair, in the same order (and with the same result) as all-pairs."""
+    if not SPATIAL_HASH:
+        for i in range(len(icons)):
+            for j in range(i + 1, len(icons)):
+                handle_collision(icons[i], icons[j])
+        return
+
+    grid = SpatialHash(icons, ICON_WIDTH)
+    for i, icon in enumerate(icons):
+        candidates = grid.near(icon, i)
+        k = 0
+        while k < len(candidates):
+            j = candidates[k]
+            k += 1
+            if handle_collision(icon, icons[j]):
+                # Both icons moved; if icon i left its cell, look again around its new position
+                grid.move(j)
+                if grid.move(i):
+                    candidates = grid.near(icon, j)
+                    k = 0
 
 # Assign starting positions for each group
 start_positions = {
@@ -145,48 +217,232 @@ start_positions = {
     "spock": (WIDTH // 2 - ICON_WIDTH // 2, HEIGHT // 2 - ICON_HEIGHT // 2),  # Center
 }
 
-# Create icons
-icons = []
-for icon_type, (start_x, start_y) in start_positions.items():
-    for _ in range(N):
-        x = random.randint(start_x, start_x + ICON_WIDTH)
-        y = random.randint(start_y, start_y + ICON_HEIGHT)
-        icons.append(Icon(x, y, icon_type))
-
-# Main game loop
-clock = pygame.time.Clock()
-running = True
-while running:
-    screen.fill((255, 255, 255))  # Clear the screen with white
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    # Move and draw icons
+def create_icons(n=N):
+    """Create n icons of each type around their starting positions."""
+    icons = []
+    for icon_type, (start_x, start_y) in start_positions.items():
+        for _ in range(n):
+            x = random.randint(start_x, start_x + ICON_WIDTH)
+            y = random.randint(start_y, start_y + ICON_HEIGHT)
+            icons.append(Icon(x, y, icon_type))
+    return icons
+
+def step_icons(icons):
+    """Advance the object engine by one fixed step; returns the winning type or None."""
     for icon in icons:
         icon.move()
-        icon.draw(screen)
+    handle_collisions(icons)
+    types = {icon.type for icon in icons}
+    return types.pop() if len(types) == 1 else None
+
+def simulate(n=N, seed=None, engine="objects", max_frames=100_000, recorder=None):
+    """Play one battle headlessly, as fast as possible.
+
+    Returns ``(winner, frames)``; winner is None if no type had won after
+    ``max_frames``. The objects engine reseeds the ``random`` module. With a
+    ``RunRecorder``, every step is written to its run log.
+    """
+    if engine == "arrays":
+        simulation = ArraySimulation.from_start_positions(
+            n, start_positions, WIDTH, HEIGHT, ICON_WIDTH, ICON_HEIGHT, beats_matrix(RPSLS_RULES), seed
+        )
+        def step():
+            simulation.step()
+            return simulation.winner()
+        def state():
+            return simulation_state(simulation)
+    else:
+        random.seed(seed)
+        icons = create_icons(n)
+        def step():
+            return step_icons(icons)
+        def state():
+            return icon_state(icons)
+
+    if recorder is not None:
+        recorder.write(0, *state())
+    for frame in range(1, max_frames + 1):
+        winner = step()
+        if recorder is not None:
+            recorder.write(frame, *state())
+        if winner is not None:
+            return winner, frame
+    return None, max_frames
+
+def icon_state(icons, alpha=1.0):
+    """Type ids and interpolated x and y lists of Icon objects, for ``IconRenderer.draw``."""
+    positions = [icon.position(alpha) for icon in icons]
+    return [TYPE_IDS[icon.type] for icon in icons], [x for x, _ in positions], [y for _, y in positions]
+
+def simulation_state(simulation, alpha=1.0):
+    """Type ids and interpolated x and y arrays of an ArraySimulation, for ``IconRenderer.draw``."""
+    x = simulation.prev_x + (simulation.x - simulation.prev_x) * alpha
+    y = simulation.prev_y + (simulation.y - simulation.prev_y) * alpha
+    return simulation.types, x, y
+
+def draw_simulation(screen, simulation, alpha=1.0):
+    """Draw an ArraySimulation's icons in one batched blit, interpolated like ``Icon.draw``."""
+    _, x, y = simulation_state(simulation, alpha)
+    positions = zip(x.tolist(), y.tolist())
+    screen.blits(
+        [(TYPE_IMAGES[type_id], position) for type_id, position in zip(simulation.types.tolist(), positions)],
+        doreturn=False,
+    )
+
+def play_log(path, renderer, speed=1.0):
+    """Play back a run log. Space pauses, Left/Right step, Page Up/Down jump a keyframe,
+    Home/End go to either end, 1-5 jump to where that type was wiped out, and
+    clicking or dragging across the window scrubs through the whole battle."""
+    log = RunLog(path)
+    extinctions = log.extinctions()
+    counts = log.type_counts()
+    width = renderer.screen.get_width()
+
+    position = 0.0  # In steps; fractional so slow playback still advances
+    paused = dragging = False
+    clock = pygame.time.Clock()
+    previous = time.perf_counter()
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                jumps = {pygame.K_LEFT: -1, pygame.K_RIGHT: 1,
+                         pygame.K_PAGEUP: -log.keyframe_interval, pygame.K_PAGEDOWN: log.keyframe_interval}
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_UP:
+                    speed *= 2
+                elif event.key == pygame.K_DOWN:
+                    speed /= 2
+                elif event.key in jumps:
+                    position, paused = int(position) + jumps[event.key], True
+                elif event.key == pygame.K_HOME:
+                    position = 0
+                elif event.key == pygame.K_END:
+                    position = log.steps
+                elif pygame.K_1 <= event.key < pygame.K_1 + len(TYPES):
+                    type_id = event.key - pygame.K_1
+                    if type_id in extinctions:
+                        position, paused = extinctions[type_id], True
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                dragging = True
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                dragging = False
+            if dragging and event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION):
+                position = event.pos[0] / max(1, width - 1) * log.steps
+
+        now = time.perf_counter()
+        if not paused and not dragging:
+            position += min(now - previous, MAX_FRAME_TIME) * STEPS_PER_SECOND * speed
+        previous = now
+        position = min(max(position, 0), log.steps)
+        step = int(position)
+
+        renderer.draw(*log.state(step))
+        alive = " ".join(f"{name} {count}" for name, count in zip(TYPES, counts[step].tolist()))
+        status = "paused" if paused else f"{speed:g}x"
+        pygame.display.set_caption(f"RPSLS replay - step {step}/{log.steps} ({status}) - {alive}")
+        clock.tick(FPS)
+
+def main():
+    parser = argparse.ArgumentParser(description="Rock Paper Scissors Lizard Spock Battle")
+    parser.add_argument("--engine", choices=("objects", "arrays"), default="objects",
+                        help="Icon objects, or the NumPy struct-of-arrays engine for huge battles")
+    parser.add_argument("-n", "--icons", type=int, default=N, help="number of icons per type")
+    parser.add_argument("--seed", type=int, help="seed for a reproducible battle")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="simulation steps per real-time step; Up/Down double or halve it while running")
+    parser.add_argument("--render", choices=MODES, default="auto",
+                        help="draw every icon, a density heatmap, or whichever fits the frame budget")
+    parser.add_argument("--record", metavar="FILE", help="save the battle to a run log")
+    parser.add_argument("--replay", metavar="FILE", help="scrub through a run log instead of simulating")
+    args = parser.parse_args()
+
+    if args.replay:
+        log = RunLog(args.replay)
+        screen = pygame.display.set_mode((log.width, log.height))
+        play_log(args.replay, IconRenderer(screen, TYPE_IMAGES, frame_budget_ms=500 / FPS, mode=args.render), args.speed)
+        pygame.quit()
+        return
 
-    # Check collisions and bounce
-    for i in range(len(icons)):
-        for j in range(i + 1, len(icons)):
-            handle_collision(icons[i], icons[j])
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    renderer = IconRenderer(screen, TYPE_IMAGES, frame_budget_ms=500 / FPS, mode=args.render)
+    if args.engine == "arrays":
+        simulation = ArraySimulation.from_start_positions(
+            args.icons, start_positions, WIDTH, HEIGHT, ICON_WIDTH, ICON_HEIGHT, beats_matrix(RPSLS_RULES), args.seed
+        )
+        def step():
+            simulation.step()
+            return simulation.winner()
+        def state(alpha=1.0):
+            return simulation_state(simulation, alpha)
+    else:
+        random.seed(args.seed)
+        icons = create_icons(args.icons)
+        def step():
+            return step_icons(icons)
+        def state(alpha=1.0):
+            return icon_state(icons, alpha)
+
+    recorder = RunRecorder(args.record, len(TYPES) * args.icons, WIDTH, HEIGHT) if args.record else None
+    if recorder is not None:
+        recorder.write(0, *state())
+
+    # Main game loop: the simulation advances in fixed steps of simulated time, however long frames take
+    step_time = 1.0 / STEPS_PER_SECOND
+    speed = args.speed
+    steps = 0
+    accumulator = 0.0
+    winner = None
+    clock = pygame.time.Clock()
+    previous = time.perf_counter()
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_UP:
+                speed *= 2
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_DOWN:
+                speed /= 2
+
+        now = time.perf_counter()
+        accumulator += min(now - previous, MAX_FRAME_TIME) * speed
+        previous = now
+
+        frame_steps = 0
+        while accumulator >= step_time and winner is None:
+            winner = step()
+            steps += 1
+            if recorder is not None:
+                recorder.write(steps, *state())
+            accumulator -= step_time
+            frame_steps += 1
+            if frame_steps == MAX_STEPS_PER_FRAME:
+                accumulator = 0.0  # Can't keep up with this speed; run as fast as we can instead
+        # Fraction of the way into the next step, so icons glide between steps at any display rate
+        alpha = 1.0 if winner is not None else accumulator / step_time
+
+        # Only the icons' old and new rects reach the display
+        renderer.draw(*state(alpha))
+        pygame.display.set_caption(f"Rock Paper Scissors Lizard Spock Battle - step {steps} ({speed:g}x)")
+
+        if winner is not None:
+            pygame.time.wait(200)  # Ensure the last conversion is shown
+            font = pygame.font.Font(None, 74)
+            text = font.render(f"{winner.capitalize()} Wins!", True, (0, 0, 0))
+            screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 2 - text.get_height() // 2))
+            pygame.display.flip()
+            pygame.time.wait(3000)
+            running = False
 
-    # Ensure final frame updates before checking for victory
-    pygame.display.flip()
+        clock.tick(FPS)
 
-    # Check if all icons are the same type
-    types = {icon.type for icon in icons}
-    if len(types) == 1:
-        pygame.time.wait(200)  # Ensure the last conversion is shown
-        font = pygame.font.Font(None, 74)
-        text = font.render(f"{list(types)[0].capitalize()} Wins!", True, (0, 0, 0))
-        screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 2 - text.get_height() // 2))
-        pygame.display.flip()
-        pygame.time.wait(3000)
-        running = False
-
-    clock.tick(FPS)
-
-pygame.quit()
+    if recorder is not None:
+        recorder.close()
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Struct-of-arrays RPSLS simulation for very large icon counts.
+
+Same rules as the ``Icon`` objects in RPSLS_game.py, but positions,
+velocities and types live in flat NumPy arrays (types as small ints) and
+every step -- random direction changes, wall bounces, overlap resolution and
+winner conversion -- is a handful of batched array operations.
+
+Collisions are resolved for all overlapping pairs at once rather than one
+pair at a time: each icon is pushed by the sum of its pairs' separations,
+bounced off the sum of their normals, and converted by any pair it loses.
+With one collision per icon this is exactly what ``handle_collision`` does.
+"""
+
+import math
+
+import numpy as np
+
+TYPES = ("rock", "paper", "scissors", "lizard", "spock")
+
+# Own cell plus the "forward" half of its neighbors, so each pair of cells is visited once
+NEIGHBOR_OFFSETS = [(0, 0), (1, -1), (1, 0), (1, 1), (0, 1)]
+
+
+def beats_matrix(rules, types=TYPES):
+    """5x5 bool matrix: beats[a, b] is True when type a converts type b."""
+    beats = np.zeros((len(types), len(types)), dtype=bool)
+    for winner, losers in rules.items():
+        for loser in losers:
+            beats[types.index(winner), types.index(loser)] = True
+    return beats
+
+
+class ArraySimulation:
+    def __init__(self, x, y, vx, vy, types, width, height, icon_width, icon_height, beats, seed=None):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.vx = np.asarray(vx, dtype=np.float64)
+        self.vy = np.asarray(vy, dtype=np.float64)
+        self.types = np.asarray(types, dtype=np.int8)
+        self.width, self.height = width, height
+        self.icon_width, self.icon_height = icon_width, icon_height
+        self.beats = beats
+        self.rng = np.random.default_rng(seed)
+        self.prev_x, self.prev_y = self.x.copy(), self.y.copy()  # Positions before the last step
+
+    @classmethod
+    def from_start_positions(cls, n, start_positions, width, height, icon_width, icon_height, beats, seed=None):
+        """n icons per type scattered around each type's start corner, heading for the center."""
+        rng = np.random.default_rng(seed)
+        x, y, types = [], [], []
+        for type_id, name in enumerate(TYPES):
+            start_x, start_y = start_positions[name]
+            x.append(rng.integers(start_x, start_x + icon_width, n, endpoint=True))
+            y.append(rng.integers(start_y, start_y + icon_height, n, endpoint=True))
+            types.append(np.full(n, type_id))
+        x, y = np.concatenate(x).astype(np.float64), np.concatenate(y).astype(np.float64)
+
+        # Velocity initialized towards the center with some randomness
+        angle = np.arctan2(height // 2 - y, width // 2 - x)
+        speed = rng.uniform(1, 2, len(x))
+        simulation = cls(
+            x, y, np.cos(angle) * speed, np.sin(angle) * speed, np.concatenate(types),
+            width, height, icon_width, icon_height, beats,
+        )
+        simulation.rng = rng
+        return simulation
+
+    def __len__(self):
+        return len(self.x)
+
+    def step(self):
+        self.move()
+        self.collide()
+
+    def move(self):
+        self.prev_x[:] = self.x
+        self.prev_y[:] = self.y
+
+        # Small random chance to change direction (1% per step)
+        turning = np.flatnonzero(self.rng.random(len(self)) < 0.01)
+        angle = self.rng.uniform(0, 2 * math.pi, len(turning))
+        speed = self.rng.uniform(1, 2, len(turning))
+        self.vx[turning] = np.cos(angle) * speed
+        self.vy[turning] = np.sin(angle) * speed
+
+        self.x += self.vx
+        self.y += self.vy
+
+        # Bounce off walls
+        self._bounce(self.x, self.vx, self.width - self.icon_width)
+        self._bounce(self.y, self.vy, self.height - self.icon_height)
+
+    @staticmethod
+    def _bounce(position, velocity, limit):
+        low = position < 0
+        position[low] = 0
+        velocity[low] = np.abs(velocity[low])
+        high = position > limit
+        position[high] = limit
+        velocity[high] = -np.abs(velocity[high])
+
+    def colliding_pairs(self):
+        """Index arrays (i, j) listing each pair of icons closer than ``icon_width`` once."""
+        size = self.icon_width
+        cell_x = np.floor(self.x / size).astype(np.int64)
+        cell_y = np.floor(self.y / size).astype(np.int64)
+        cell_x -= cell_x.min() - 1  # Leave an empty border so neighbor cells stay in range
+        cell_y -= cell_y.min() - 1
+        rows = int(cell_y.max()) + 2
+        cells = (int(cell_x.max()) + 2) * rows
+
+        # Icons sorted by cell, with each cell's slice of the sorted order
+        keys = cell_x * rows + cell_y
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+        sorted_x, sorted_y = self.x[order], self.y[order]
+        counts = np.bincount(keys, minlength=cells)
+        starts = np.cumsum(counts) - counts
+
+        # Candidate pairs are built in sorted order, where each cell's icons are contiguous
+        first, second = [], []
+        for dx, dy in NEIGHBOR_OFFSETS:
+            neighbor = sorted_keys + dx * rows + dy
+            lengths = counts[neighbor]
+            total = int(lengths.sum())
+            if total == 0:
+                continue
+            i = np.repeat(np.arange(len(self)), lengths)
+            j = np.arange(total) + np.repeat(starts[neighbor] - (np.cumsum(lengths) - lengths), lengths)
+            if dx == 0 and dy == 0:
+                keep = i < j  # Same cell: take each pair once and skip the icon itself
+                i, j = i[keep], j[keep]
+            distance = np.hypot(sorted_x[i] - sorted_x[j], sorted_y[i] - sorted_y[j])
+            hit = (distance > 0) & (distance < size)
+            first.append(i[hit])
+            second.append(j[hit])
+
+        if not first:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return order[np.concatenate(first)], order[np.concatenate(second)]
+
+    def collide(self):
+        i, j = self.colliding_pairs()
+        if len(i) == 0:
+            return
+
+        dx = self.x[i] - self.x[j]
+        dy = self.y[i] - self.y[j]
+        distance = np.hypot(dx, dy)
+        normal_x, normal_y = dx / distance, dy / distance
+
+        # Resolve overlap by moving icons apart
+        push = (self.icon_width - distance) / 2
+        count = len(self)
+        shift_x = np.bincount(i, normal_x * push, count) - np.bincount(j, normal_x * push, count)
+        shift_y = np.bincount(i, normal_y * push, count) - np.bincount(j, normal_y * push, count)
+        self.x += shift_x
+        self.y += shift_y
+
+        # Reflect velocities about the combined collision normal of each icon
+        sum_x = np.bincount(i, normal_x, count) - np.bincount(j, normal_x, count)
+        sum_y = np.bincount(i, normal_y, count) - np.bincount(j, normal_y, count)
+        hit = np.flatnonzero(np.bincount(i, minlength=count) + np.bincount(j, minlength=count))
+        norm = np.hypot(sum_x[hit], sum_y[hit])
+        norm[norm == 0] = 1  # Opposite normals cancel out; reflecting about (0, 0) is a no-op
+        nx, ny = sum_x[hit] / norm, sum_y[hit] / norm
+        dot = self.vx[hit] * nx + self.vy[hit] * ny
+        self.vx[hit] -= 2 * dot * nx
+        self.vy[hit] -= 2 * dot * ny
+
+        # Determine the winners with the beats matrix, from the types before this step
+        type_i, type_j = self.types[i], self.types[j]
+        i_wins = self.beats[type_i, type_j]
+        j_wins = self.beats[type_j, type_i]
+        self.types[j[i_wins]] = type_i[i_wins]
+        self.types[i[j_wins]] = type_j[j_wins]
+
+    def counts(self):
+        return np.bincount(self.types, minlength=len(TYPES))
+
+    def winner(self):
+        """Name of the only remaining type, or None while several are left."""
+        alive = np.flatnonzero(self.counts())
+        return TYPES[alive[0]] if len(alive) == 1 else None
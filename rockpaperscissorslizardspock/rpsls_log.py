@@ -0,0 +1,167 @@
+"""Record RPSLS battles to a compact binary run log and seek around in them.
+
+Every icon's position and type is stored in a keyframe every
+``keyframe_interval`` steps (and at the last step); in between, only the
+icons whose type changed are stored, one small delta chunk per step that had
+conversions. Rebuilding any step reads one keyframe and at most
+``keyframe_interval`` deltas, so the reader can jump anywhere in a long
+battle without re-simulating it. Types are exact at every step; positions
+between keyframes are interpolated from the two surrounding keyframes.
+
+    header:  8s magic, then uint32 version, icons, keyframe interval,
+             width, height, reserved
+    chunk:   uint8 kind, 3 pad bytes, uint32 step, uint32 entries, then
+             keyframe: icons x (float32 x, float32 y, int8 type)
+             delta:    entries x (uint32 icon index, int8 new type)
+"""
+
+import struct
+
+import numpy as np
+
+from rpsls_arrays import TYPES
+
+MAGIC = b"RPSLOG\x00\x00"
+VERSION = 1
+HEADER = struct.Struct("<8s6I")
+CHUNK = struct.Struct("<B3xII")
+
+KEYFRAME = 0
+DELTA = 1
+KEYFRAME_INTERVAL = 10
+
+KEYFRAME_DTYPE = np.dtype([("x", "<f4"), ("y", "<f4"), ("type", "i1")])
+DELTA_DTYPE = np.dtype([("index", "<u4"), ("type", "i1")])
+
+
+class RunRecorder:
+    """Append the state after every step with buffered writes."""
+
+    def __init__(self, path, icons, width, height, keyframe_interval=KEYFRAME_INTERVAL, buffer_size=1 << 20):
+        self.icons = icons
+        self.keyframe_interval = keyframe_interval
+        self._file = open(path, "wb", buffering=buffer_size)
+        self._file.write(HEADER.pack(MAGIC, VERSION, icons, keyframe_interval, width, height, 0))
+        self._types = None
+        self._last = None  # (step, types, x, y) of the newest step not saved as a keyframe
+
+    def write(self, step, types, x, y):
+        """Record the state at ``step``; steps must be written in order, starting with a keyframe."""
+        types = np.asarray(types, dtype=np.int8)
+        if self._types is None or step % self.keyframe_interval == 0:
+            self._keyframe(step, types, x, y)
+            return
+
+        changed = np.flatnonzero(types != self._types)
+        if len(changed):
+            delta = np.empty(len(changed), dtype=DELTA_DTYPE)
+            delta["index"] = changed
+            delta["type"] = types[changed]
+            self._file.write(CHUNK.pack(DELTA, step, len(delta)))
+            self._file.write(delta.tobytes())
+            self._types[changed] = types[changed]
+        self._last = (step, types, x, y)
+
+    def _keyframe(self, step, types, x, y):
+        keyframe = np.empty(self.icons, dtype=KEYFRAME_DTYPE)
+        keyframe["x"], keyframe["y"], keyframe["type"] = x, y, types
+        self._file.write(CHUNK.pack(KEYFRAME, step, self.icons))
+        self._file.write(keyframe.tobytes())
+        self._types = types.copy()
+        self._last = None
+
+    def close(self):
+        if self._last is not None:
+            self._keyframe(*self._last)  # So the final steps have a keyframe to interpolate towards
+        self._file.close()
+
+
+class RunLog:
+    """Memory-mapped, seekable reader for a run log."""
+
+    def __init__(self, path):
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, self.icons, self.keyframe_interval, self.width, self.height, _ = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} RPSLS run log")
+
+        # One pass over the chunk headers to index where every keyframe and delta lives
+        keyframes, deltas = [], []
+        offset = HEADER.size
+        while offset + CHUNK.size <= len(self.data):
+            kind, step, entries = CHUNK.unpack_from(self.data, offset)
+            size = entries * (KEYFRAME_DTYPE if kind == KEYFRAME else DELTA_DTYPE).itemsize
+            if offset + CHUNK.size + size > len(self.data):
+                break  # A log cut short mid-chunk (e.g. the program was killed) loses its last chunk
+            (keyframes if kind == KEYFRAME else deltas).append((step, offset + CHUNK.size, entries))
+            offset += CHUNK.size + size
+        if not keyframes:
+            raise ValueError(f"{path} has no keyframes")
+
+        self.keyframe_steps = np.array([step for step, _, _ in keyframes])
+        self._keyframes = keyframes
+        self.delta_steps = np.array([step for step, _, _ in deltas], dtype=np.int64)
+        self._deltas = deltas
+        self.steps = int(max(self.keyframe_steps[-1], self.delta_steps[-1] if deltas else 0))
+        self._counts = None
+
+    def keyframe(self, index):
+        _, offset, entries = self._keyframes[index]
+        return np.frombuffer(self.data, dtype=KEYFRAME_DTYPE, count=entries, offset=offset)
+
+    def delta(self, index):
+        _, offset, entries = self._deltas[index]
+        return np.frombuffer(self.data, dtype=DELTA_DTYPE, count=entries, offset=offset)
+
+    def state(self, step):
+        """Type ids and x and y arrays at ``step``, clamped to the recorded range."""
+        step = min(max(step, int(self.keyframe_steps[0])), self.steps)
+        index = int(np.searchsorted(self.keyframe_steps, step, side="right")) - 1
+        keyframe = self.keyframe(index)
+        key_step = int(self.keyframe_steps[index])
+
+        types = keyframe["type"].copy()
+        first, last = np.searchsorted(self.delta_steps, [key_step, step], side="right")
+        for delta in range(first, last):
+            changes = self.delta(delta)
+            types[changes["index"]] = changes["type"]
+
+        x, y = keyframe["x"].astype(np.float64), keyframe["y"].astype(np.float64)
+        if step > key_step and index + 1 < len(self._keyframes):
+            following = self.keyframe(index + 1)
+            t = (step - key_step) / (int(self.keyframe_steps[index + 1]) - key_step)
+            x += (following["x"] - x) * t
+            y += (following["y"] - y) * t
+        return types, x, y
+
+    def type_counts(self):
+        """(steps + 1, types) array of how many icons of each type there are at every step."""
+        if self._counts is None:
+            kinds = len(TYPES)
+            event_steps, event_counts = [], []
+            for index, key_step in enumerate(self.keyframe_steps.tolist()):
+                types = self.keyframe(index)["type"].copy()
+                current = np.bincount(types, minlength=kinds)
+                event_steps.append(key_step)
+                event_counts.append(current.copy())
+                end = self.keyframe_steps[index + 1] if index + 1 < len(self._keyframes) else self.steps + 1
+                first, last = np.searchsorted(self.delta_steps, [key_step, end], side="left")
+                for delta in range(first, last):
+                    changes = self.delta(delta)
+                    current += np.bincount(changes["type"], minlength=kinds)
+                    current -= np.bincount(types[changes["index"]], minlength=kinds)
+                    types[changes["index"]] = changes["type"]
+                    event_steps.append(int(self.delta_steps[delta]))
+                    event_counts.append(current.copy())
+            latest = np.searchsorted(event_steps, np.arange(self.steps + 1), side="right") - 1
+            self._counts = np.array(event_counts)[np.maximum(latest, 0)]
+        return self._counts
+
+    def extinctions(self):
+        """Step at which each type that started out alive was wiped out, by type id."""
+        counts = self.type_counts()
+        return {
+            kind: int(np.argmax(counts[:, kind] == 0))
+            for kind in range(len(TYPES))
+            if counts[0, kind] > 0 and counts[-1, kind] == 0
+        }
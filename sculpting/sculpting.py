@@ -1,26 +1,48 @@
-import cv2
-import mediapipe as mp
+import argparse
+import atexit
+import os
+import sys
+
 import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
 
-# Initialize Mediapipe Hand Tracking
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(min_detection_confidence=0.7, min_tracking_confidence=0.7)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import landmark_log
+from common.landmark_filter import LandmarkFilter
+from common.roi_inference import make_hand_tracker
+from voxel_mesh import ChunkedMesh
+from voxel_store import ChunkedVoxels
+
+# Hand landmark indices (mp.solutions.hands.HandLandmark)
+WRIST, THUMB_TIP, INDEX_FINGER_TIP = 0, 4, 8
+GRID_SIZE = 20  # Clay cells along each side, unless --grid-size says otherwise
+
+def make_clay(size):
+    """An empty ``size``³ clay grid and the mesh of its surface."""
+    clay = ChunkedVoxels((size, size, size))  # Sparse 3D array of clay amounts, in 16³ chunks
+    # Unit cells centred on the old cube positions, so neighbouring clay joins up into one surface
+    return clay, ChunkedMesh(clay, origin=-(size // 2) - 0.5)
 
 # Initialize a 3D clay (cube mesh)
-grid_size = 20
-clay = np.zeros((grid_size, grid_size, grid_size))  # 3D array representing the clay
+grid_size = GRID_SIZE
+clay, clay_mesh = make_clay(grid_size)
 
-# Webcam input
-cap = cv2.VideoCapture(0)
+INFERENCE_SETTINGS = None  # Full frame; RoiHandTracker settings such as dict(scale=0.5) once measured
+
+pipeline = None  # Opened by main()
+last_seq = -1  # Sequence number of the last camera frame used for sculpting
+
+# One-Euro smoothing without prediction: gestures should follow the measured hand, not a guess
+FILTER_SETTINGS = dict(min_cutoff=1.0, beta=10.0, prediction=0.0)
+landmark_filter = LandmarkFilter(**FILTER_SETTINGS)
 
 def detect_gesture(hand_landmarks):
     """Classify gestures based on hand landmarks."""
-    thumb_tip = hand_landmarks.landmark[mp_hands.HandLandmark.THUMB_TIP]
-    index_tip = hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP]
-    palm = hand_landmarks.landmark[mp_hands.HandLandmark.WRIST]
+    thumb_tip = hand_landmarks.landmark[THUMB_TIP]
+    index_tip = hand_landmarks.landmark[INDEX_FINGER_TIP]
+    palm = hand_landmarks.landmark[WRIST]
 
     # Measure distances
     pinch_distance = ((thumb_tip.x - index_tip.x)**2 + (thumb_tip.y - index_tip.y)**2)**0.5
@@ -34,17 +56,20 @@ def detect_gesture(hand_landmarks):
         return "poke"
 
 def draw_clay():
-    """Render the clay as a 3D grid of cubes."""
+    """Render the clay's exposed faces as one vertex array draw."""
+    mesh = clay_mesh.update()  # Remeshes just the chunks sculpting changed
+    if not len(mesh.indices):
+        return
+
     glPushMatrix()
     glTranslatef(0, 0, -50)  # Move the clay grid into the view
-    for x in range(grid_size):
-        for y in range(grid_size):
-            for z in range(grid_size):
-                if clay[x, y, z] > 0:  # Only draw active parts
-                    glPushMatrix()
-                    glTranslatef(x - grid_size // 2, y - grid_size // 2, z - grid_size // 2)
-                    glutSolidCube(0.5)  # Adjust size as needed
-                    glPopMatrix()
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glEnableClientState(GL_NORMAL_ARRAY)
+    glVertexPointer(3, GL_FLOAT, 0, mesh.vertices)
+    glNormalPointer(GL_FLOAT, 0, mesh.normals)
+    glDrawElements(GL_TRIANGLES, len(mesh.indices), GL_UNSIGNED_INT, mesh.indices)
+    glDisableClientState(GL_NORMAL_ARRAY)
+    glDisableClientState(GL_VERTEX_ARRAY)
     glPopMatrix()
 
 def sculpt(clay, gesture, hand_position):
@@ -61,22 +86,20 @@ def sculpt(clay, gesture, hand_position):
 
 def update():
     """Update logic for the game."""
-    global clay
+    global last_seq
 
-    ret, frame = cap.read()
-    if not ret:
+    # Take the freshest hand tracking result; each camera frame sculpts only once
+    packet = pipeline.latest()
+    if packet is None or packet.seq == last_seq:
         return
+    last_seq = packet.seq
+    hand_landmarks_list = landmark_filter.apply(packet.result.multi_hand_landmarks, packet.captured_at)
 
-    # Flip and process the frame for hand tracking
-    frame = cv2.flip(frame, 1)
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    result = hands.process(rgb_frame)
-
-    if result.multi_hand_landmarks:
-        for hand_landmarks in result.multi_hand_landmarks:
+    if hand_landmarks_list:
+        for hand_landmarks in hand_landmarks_list:
             # Detect gesture and map hand position to the grid
             gesture = detect_gesture(hand_landmarks)
-            index_tip = hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP]
+            index_tip = hand_landmarks.landmark[INDEX_FINGER_TIP]
             hand_position = (
                 int((index_tip.x - 0.5) * grid_size),
                 int((index_tip.y - 0.5) * grid_size),
@@ -96,8 +119,27 @@ def idle():
     update()
     glutPostRedisplay()
 
+def shutdown():
+    """Stop the capture threads and print their latency report."""
+    pipeline.stop()
+    print(pipeline.report())
+
 def main():
     """Main function to initialize OpenGL and run the game."""
+    global grid_size, clay, clay_mesh, pipeline
+
+    parser = argparse.ArgumentParser(description="3D Sculpting")
+    landmark_log.add_arguments(parser)
+    parser.add_argument("--grid-size", type=int, default=GRID_SIZE, help="clay cells along each side")
+    args = parser.parse_args()
+
+    grid_size = args.grid_size
+    clay, clay_mesh = make_clay(grid_size)
+    # Webcam input and hand detection run on worker threads (or replay a recording)
+    pipeline = landmark_log.open_pipeline(
+        args, landmark_log.HANDS, lambda: make_hand_tracker(INFERENCE_SETTINGS)
+    )
+
     glutInit()
     glutInitDisplayMode(GLUT_RGBA | GLUT_DOUBLE | GLUT_DEPTH)
     glutInitWindowSize(800, 600)
@@ -106,6 +148,8 @@ def main():
 
     glutDisplayFunc(display)
     glutIdleFunc(idle)
+    pipeline.start()
+    atexit.register(shutdown)  # glutMainLoop only returns by exiting the process
     glutMainLoop()
 
 if __name__ == "__main__":
@@ -0,0 +1,156 @@
+"""Surface mesher for voxel clay: only the faces that can be seen, in one buffer.
+
+A face of a solid cell is exposed when the neighbouring cell across it is
+empty (or outside the grid). ``mesh_voxels`` finds the exposed faces of
+all six directions with array shifts, merges each row of them into one
+long quad (a greedy pass along one axis of the face's plane), and returns
+a ``Mesh`` of float32 vertices and normals plus uint32 triangle indices,
+ready for a single ``glDrawElements`` call. ``ChunkedMesh`` keeps one
+such mesh per chunk of a ``voxel_store.ChunkedVoxels`` and remeshes only
+the chunks that changed. Everything is plain NumPy, so it runs and can be
+checked without a GL context.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+Mesh = namedtuple("Mesh", "vertices normals indices")
+EMPTY = Mesh(np.zeros((0, 3), np.float32), np.zeros((0, 3), np.float32), np.zeros(0, np.uint32))
+
+
+def _directions():
+    """Per face direction: (axis, step, run axis, other in-plane axis, quad corners as (u, v) unit offsets)."""
+    directions = []
+    for axis in range(3):
+        run, other = [a for a in range(3) if a != axis][::-1]  # Rows run along the later axis
+        for step in (-1, 1):
+            normal = np.zeros(3)
+            normal[axis] = step
+            u, v = np.eye(3)[other], np.eye(3)[run]
+            corners = [(0, 0), (1, 0), (1, 1), (0, 1)]
+            if np.dot(np.cross(u, v), normal) < 0:
+                corners = [(0, 0), (0, 1), (1, 1), (1, 0)]  # Keep counter-clockwise seen from outside
+            directions.append((axis, step, run, other, np.array(corners)))
+    return directions
+
+
+DIRECTIONS = _directions()
+QUAD_TRIANGLES = np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32)
+
+
+def exposed_faces(solid, axis, step, halo=False):
+    """Boolean array marking the cells of ``solid`` whose face towards ``step`` along ``axis`` is exposed.
+
+    With ``halo``, the outermost layer of ``solid`` is only there as neighbours and gets no faces itself.
+    """
+    padded = solid if halo else np.pad(solid, 1)
+    inner = tuple(slice(1, -1) for _ in range(3))
+    neighbour = tuple(slice(1 + step, padded.shape[a] - 1 + step) if a == axis else slice(1, -1) for a in range(3))
+    return padded[inner] & ~padded[neighbour]
+
+
+def _rows(faces, run):
+    """Start cells and lengths of the runs of True along axis ``run``."""
+    rolled = np.moveaxis(faces, run, -1)  # Runs along the last axis come out of nonzero in order
+    before = np.zeros_like(rolled)
+    before[..., 1:] = rolled[..., :-1]
+    after = np.zeros_like(rolled)
+    after[..., :-1] = rolled[..., 1:]
+    starts = np.array(np.nonzero(rolled & ~before))
+    ends = np.nonzero(rolled & ~after)[-1]
+    lengths = ends - starts[-1] + 1
+    return np.moveaxis(starts, 0, -1)[:, _unroll(run)], lengths
+
+
+def _unroll(run):
+    """Index order that undoes ``np.moveaxis(array, run, -1)`` on coordinate columns."""
+    order = [a for a in range(3) if a != run] + [run]
+    return np.argsort(order)
+
+
+def mesh_voxels(solid, origin=0.0, scale=1.0, merge=True, halo=False):
+    """``Mesh`` of the exposed faces of a boolean ``(x, y, z)`` array; cell ``(i, j, k)`` spans ``origin + (i..i+1) * scale``.
+
+    With ``merge`` off, every exposed face is its own quad. With ``halo``,
+    the array has a one-cell border of neighbouring cells that decide
+    which faces are exposed but aren't meshed, and the first cell inside
+    that border is the one at ``origin``.
+    """
+    solid = np.asarray(solid, dtype=bool)
+    vertices, normals = [], []
+    for axis, step, run, other, corners in DIRECTIONS:
+        faces = exposed_faces(solid, axis, step, halo)
+        if merge:
+            cells, lengths = _rows(faces, run)
+        else:
+            cells = np.argwhere(faces)
+            lengths = np.ones(len(cells), dtype=np.intp)
+        if not len(cells):
+            continue
+
+        quads = np.repeat(cells[:, None, :].astype(np.float32), 4, axis=1)  # (quads, 4 corners, xyz)
+        quads[:, :, axis] += 1 if step > 0 else 0  # The face's plane
+        quads[:, :, other] += corners[:, 0]
+        quads[:, :, run] += corners[:, 1] * lengths[:, None]
+        vertices.append(quads.reshape(-1, 3))
+        normal = np.zeros(3, dtype=np.float32)
+        normal[axis] = step
+        normals.append(np.broadcast_to(normal, (len(cells) * 4, 3)))
+
+    if not vertices:
+        return EMPTY
+    vertices = np.concatenate(vertices) * np.float32(scale) + np.asarray(origin, dtype=np.float32)
+    normals = np.concatenate(normals)
+    quad_count = len(vertices) // 4
+    indices = (np.arange(quad_count, dtype=np.uint32)[:, None] * 4 + QUAD_TRIANGLES).ravel()
+    return Mesh(vertices.astype(np.float32), normals, indices)
+
+
+def combine(meshes):
+    """One ``Mesh`` holding all of ``meshes``, for a single draw call."""
+    meshes = [mesh for mesh in meshes if len(mesh.indices)]
+    if not meshes:
+        return EMPTY
+    offsets = np.cumsum([0] + [len(mesh.vertices) for mesh in meshes[:-1]], dtype=np.uint32)
+    return Mesh(
+        np.concatenate([mesh.vertices for mesh in meshes]),
+        np.concatenate([mesh.normals for mesh in meshes]),
+        np.concatenate([mesh.indices + offset for mesh, offset in zip(meshes, offsets)]),
+    )
+
+
+class ChunkedMesh:
+    """The surface of a ``voxel_store.ChunkedVoxels``, meshed chunk by chunk.
+
+    ``update()`` remeshes only the chunks the store reports dirty (each one
+    with a one-cell halo read from its neighbours, so faces between chunks
+    come out right) and returns all of them combined into one ``Mesh``.
+    """
+
+    def __init__(self, voxels, origin=0.0, scale=1.0, merge=True):
+        self.voxels = voxels
+        self.origin = np.asarray(origin, dtype=np.float32)
+        self.scale = scale
+        self.merge = merge
+        self.meshes = {}  # Chunk key -> Mesh, for chunks with any faces
+        self.mesh = EMPTY
+        self.remeshed = 0  # Chunks remeshed by the last update
+
+    def update(self):
+        dirty = self.voxels.take_dirty()
+        for key in dirty:
+            if key not in self.voxels.chunks:  # Emptied, or a neighbour of a change with no clay of its own
+                self.meshes.pop(key, None)
+                continue
+            start = np.array(self.voxels.chunk_origin(key))
+            solid = self.voxels.read(start - 1, start + self.voxels.chunk + 1) > 0
+            mesh = mesh_voxels(solid, self.origin + start * self.scale, self.scale, self.merge, halo=True)
+            if len(mesh.indices):
+                self.meshes[key] = mesh
+            else:
+                self.meshes.pop(key, None)
+        self.remeshed = len(dirty)
+        if dirty:
+            self.mesh = combine(self.meshes.values())
+        return self.mesh
@@ -0,0 +1,99 @@
+"""Chunked sparse voxel storage for the sculpting clay.
+
+The grid is split into ``chunk``³ blocks that are only allocated once
+something non-zero is written to them, and freed again when they are
+emptied, so memory follows the occupied volume rather than the grid size.
+Cells are uint8 clay amounts that saturate at 255 instead of wrapping.
+
+Every write marks the chunks it touches as dirty, plus the neighbouring
+chunks when it touches a chunk's edge (their exposed faces may have
+changed too). ``take_dirty`` hands that set to the mesher and clears it,
+so only changed chunks are remeshed.
+"""
+
+import itertools
+
+import numpy as np
+
+
+class ChunkedVoxels:
+    def __init__(self, shape, chunk=16, dtype=np.uint8):
+        self.shape = tuple(int(size) for size in shape)
+        self.chunk = chunk
+        self.dtype = np.dtype(dtype)
+        self.max_value = np.iinfo(self.dtype).max
+        self.chunks = {}  # (cx, cy, cz) -> chunk³ array
+        self.dirty = set()  # Chunk keys changed since the last take_dirty
+
+    @property
+    def nbytes(self):
+        return len(self.chunks) * self.chunk ** 3 * self.dtype.itemsize
+
+    def chunk_origin(self, key):
+        return tuple(k * self.chunk for k in key)
+
+    def __getitem__(self, index):
+        x, y, z = (int(i) for i in index)
+        chunk = self.chunks.get((x // self.chunk, y // self.chunk, z // self.chunk))
+        if chunk is None:
+            return 0
+        return int(chunk[x % self.chunk, y % self.chunk, z % self.chunk])
+
+    def __setitem__(self, index, value):
+        index = tuple(int(i) for i in index)
+        self.write(index, np.full((1, 1, 1), min(max(int(value), 0), self.max_value), dtype=self.dtype))
+
+    def read(self, start, stop):
+        """Dense copy of the region ``start`` to ``stop`` (exclusive); cells outside the grid read as 0."""
+        start, stop = np.array(start), np.array(stop)
+        region = np.zeros(stop - start, dtype=self.dtype)
+        for key, low, high in self._overlapping(start, stop):
+            chunk = self.chunks.get(key)
+            if chunk is not None:
+                origin = np.array(key) * self.chunk
+                region[_slices(low - start, high - start)] = chunk[_slices(low - origin, high - origin)]
+        return region
+
+    def write(self, start, values):
+        """Write a dense block of ``values`` with its first corner at ``start``; it must fit in the grid."""
+        values = np.asarray(values)
+        start = np.array(start)
+        stop = start + values.shape
+        if (start < 0).any() or (stop > self.shape).any():
+            raise IndexError(f"region {tuple(start)}-{tuple(stop)} is outside the {self.shape} grid")
+        values = np.clip(values, 0, self.max_value).astype(self.dtype, copy=False)
+
+        for key, low, high in self._overlapping(start, stop):
+            block = values[_slices(low - start, high - start)]
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                if not block.any():
+                    continue
+                chunk = self.chunks[key] = np.zeros((self.chunk,) * 3, dtype=self.dtype)
+            origin = np.array(key) * self.chunk
+            chunk[_slices(low - origin, high - origin)] = block
+            if not chunk.any():
+                del self.chunks[key]
+        # Faces along the region's edges belong to the neighbouring chunks' meshes
+        around = self._overlapping(np.maximum(start - 1, 0), np.minimum(stop + 1, self.shape))
+        self.dirty.update(key for key, _, _ in around)
+
+    def take_dirty(self):
+        """Chunk keys changed since the last call."""
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    def _overlapping(self, start, stop):
+        """``(key, low, high)`` for each chunk overlapping the region, with the overlap's grid corners."""
+        first = np.maximum(start, 0) // self.chunk
+        last = (np.minimum(stop, self.shape) - 1) // self.chunk
+        for key in itertools.product(*(range(a, b + 1) for a, b in zip(first, last))):
+            origin = np.array(key) * self.chunk
+            low = np.maximum(start, origin)
+            high = np.minimum(stop, origin + self.chunk)
+            if (low < high).all():
+                yield key, low, high
+
+
+def _slices(low, high):
+    return tuple(slice(a, b) for a, b in zip(low, high))
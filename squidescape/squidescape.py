@@ -1,19 +1,31 @@
+import argparse
+import os
+import sys
+
 import cv2
-import mediapipe as mp
 import numpy as np
 import random
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import landmark_log
+
+parser = argparse.ArgumentParser(description="Squid Escape")
+landmark_log.add_arguments(parser)
+args = parser.parse_args()
+
 squid_pos = None  # Will initialize after we know width/height
 
 
 
 
-# Initialize Mediapipe Face Mesh
-mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(refine_landmarks=True)
+def make_face_tracker():
+    """Create the MediaPipe face mesh (only needed when not replaying)."""
+    import mediapipe as mp
+    face_mesh = mp.solutions.face_mesh.FaceMesh(refine_landmarks=True)
+    return face_mesh.process
 
-# Webcam setup
-cap = cv2.VideoCapture(0)
+# Webcam capture and face mesh detection run on worker threads (or replay a recording)
+pipeline = landmark_log.open_pipeline(args, landmark_log.FACE, make_face_tracker)
 
 # Calibration variables
 calibration_points = {"top_left": None, "top_right": None, "bottom_left": None, "bottom_right": None}
@@ -52,22 +64,38 @@ squid_height, squid_width, _ = squid.shape
 squid = cv2.resize(squid, (20, 20))
 
 # Main loop
+pipeline.start()
+last_seq = -1
 while True:
-    ret, frame = cap.read()
-    if not ret:
+    if pipeline.finished:
+        break
+
+    # One key read per pass, so none are lost while waiting for a new frame
+    key = cv2.waitKey(1) & 0xFF
+    # Exit the program
+    if key == ord('q'):
         break
+    # Check if recalibration is triggered
+    if key == ord('r'):
+        # Reset calibration if 'r' is pressed
+        calibration_points = {"top_left": None, "top_right": None, "bottom_left": None, "bottom_right": None}
+        current_corner = 0
+        print("Recalibration started!")
 
-    # Flip frame for a mirror effect
-    frame = cv2.flip(frame, 1)
+    # Draw on a copy of the freshest (already mirrored) frame without waiting for the camera;
+    # an unchanged packet is already on screen, unless 'd' needs its gaze for calibration
+    packet = pipeline.latest()
+    if packet is None or (packet.seq == last_seq and key != ord('d')):
+        continue
+    last_seq = packet.seq
+    frame = packet.frame.copy()
     height, width, _ = frame.shape
     
     if squid_pos is None:
         squid_pos = [random.randint(0, width - 20), random.randint(0, height - 20)]
 
 
-    # Convert the image to RGB for Mediapipe processing
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    result = face_mesh.process(rgb_frame)
+    result = packet.result
 
     # Draw calibration marker if calibration is not complete
     if current_corner < len(corner_names):
@@ -100,7 +128,7 @@ while True:
             # Calibration process
             if current_corner < len(corner_names):
                 # Wait for user to press 'd' to save the gaze position
-                if cv2.waitKey(1) & 0xFF == ord('d'):
+                if key == ord('d'):
                     calibration_points[corner_names[current_corner]] = (gaze_x, gaze_y)
                     current_corner += 1
             else:
@@ -137,17 +165,6 @@ while True:
     cv2.setWindowProperty("Gaze Tracking", cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
     cv2.imshow("Gaze Tracking", frame)
 
-
-    # Exit the program
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-    # Check for keypress
-    # Check if recalibration is triggered
-    if cv2.waitKey(1) & 0xFF == ord('r'):
-        # Reset calibration if 'r' is pressed
-        calibration_points = {"top_left": None, "top_right": None, "bottom_left": None, "bottom_right": None}
-        current_corner = 0
-        print("Recalibration started!")
-
-cap.release()
+pipeline.stop()
+print(pipeline.report())
 cv2.destroyAllWindows()
\ No newline at end of file